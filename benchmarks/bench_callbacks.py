@@ -0,0 +1,76 @@
+import argparse
+import random
+import time
+
+from langchain.schema import Generation, LLMResult
+
+from chat_o_sophy.callbacks import (STREAMING_CONFIG,
+                                    StreamingChatCallbackHandler)
+
+
+class CountingContainer:
+    def __init__(self):
+        self.render_calls = 0
+        self.bytes_sent = 0
+
+    def markdown(self, body, **kwargs):
+        self.render_calls += 1
+        self.bytes_sent += len(body.encode())
+
+    def empty(self):
+        pass
+
+
+def fake_tokens(n_tokens, seed=0):
+    rng = random.Random(seed)
+    words = ["the", "good", "life", "reason", "virtue", "will", "being", "truth"]
+    return [" " + rng.choice(words) for _ in range(n_tokens)]
+
+
+def run(tokens, token_delay, **handler_kwargs):
+    container = CountingContainer()
+    handler = StreamingChatCallbackHandler(container=container, **handler_kwargs)
+    start = time.perf_counter()
+    handler.on_llm_start()
+    for token in tokens:
+        handler.on_llm_new_token(token)
+        if token_delay:
+            time.sleep(token_delay)
+    text = "".join(tokens)
+    handler.on_llm_end(LLMResult(generations=[[Generation(text=text)]]))
+    return {
+        "render_calls": container.render_calls,
+        "bytes_sent": container.bytes_sent,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render calls and bytes sent per streamed answer"
+    )
+    parser.add_argument("--tokens", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    modes = {
+        "unbuffered": {"buffered": False},
+        "buffered": {
+            "buffered": True,
+            "flush_interval": STREAMING_CONFIG["flush_interval"],
+            "flush_bytes": STREAMING_CONFIG["flush_bytes"],
+        },
+    }
+    print(f"{'tokens':>8} {'mode':>12} {'renders':>9} {'bytes':>12} {'seconds':>9}")
+    for n_tokens in args.tokens:
+        tokens = fake_tokens(n_tokens)
+        for mode, handler_kwargs in modes.items():
+            result = run(tokens, args.token_delay, **handler_kwargs)
+            print(
+                f"{n_tokens:>8} {mode:>12} {result['render_calls']:>9} "
+                f"{result['bytes_sent']:>12} {result['seconds']:>9.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
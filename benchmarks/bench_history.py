@@ -0,0 +1,72 @@
+import argparse
+import time
+
+from benchmarks.bench_callbacks import fake_tokens
+from chat_o_sophy import rendering
+from chat_o_sophy.history import ChatHistory
+
+
+class CountingStreamlit:
+    def __init__(self):
+        self.session_state = {}
+        self.elements = 0
+        self.bytes_sent = 0
+
+    def chat_message(self, role, avatar=None):
+        self.elements += 1
+        return self
+
+    def markdown(self, body, **kwargs):
+        self.elements += 1
+        self.bytes_sent += len(body.encode())
+
+    def button(self, **kwargs):
+        self.elements += 1
+
+
+def build_history(n_turns: int) -> ChatHistory:
+    history = ChatHistory(offset=1)
+    history.append("human", "<greetings>")
+    history.append("ai", "".join(fake_tokens(150)))
+    for turn in range(n_turns):
+        history.append("human", f"Question {turn}?")
+        history.append("ai", "".join(fake_tokens(150, seed=turn)))
+    return history
+
+
+def rerun(history: ChatHistory, window: int, repeat: int) -> dict:
+    stub = CountingStreamlit()
+    stub.session_state[rendering.SHOWN_KEY] = window
+    rendering.st = stub
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rendering.render_history(history, avatar=None)
+    return {
+        "seconds": (time.perf_counter() - start) / repeat,
+        "elements": stub.elements // repeat,
+        "bytes": stub.bytes_sent // repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-rerun cost of the single-mode chat history"
+    )
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    window = rendering.STREAMING_CONFIG["history_window"]
+    print(f"{'turns':>6} {'mode':>9} {'elements':>9} {'bytes':>10} {'ms/rerun':>9}")
+    for n_turns in args.turns:
+        history = build_history(n_turns)
+        for mode, shown in (("full", len(history)), ("windowed", window)):
+            result = rerun(history, shown, args.repeat)
+            print(
+                f"{n_turns:>6} {mode:>9} {result['elements']:>9} "
+                f"{result['bytes']:>10} {result['seconds'] * 1000:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
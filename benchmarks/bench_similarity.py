@@ -0,0 +1,92 @@
+import argparse
+import random
+import statistics
+import time
+
+from chat_o_sophy.similarity import SIMILARITY_CONFIG, QuestionIndex
+
+PHILOSOPHERS = ["Plato", "Aristotle", "Immanuel Kant"]
+SYLLABLES = ["ka", "lo", "mi", "re", "tu", "sa", "no", "vi", "de", "po", "zu", "fe"]
+FILLERS = ["what", "is", "the", "of", "do", "you", "think", "about", "why", "how"]
+
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) + "x")
+    return sorted(words)
+
+
+def question(words: list) -> str:
+    return " ".join(words) + "?"
+
+
+def paraphrase(words: list, rng: random.Random) -> str:
+    shuffled = rng.sample(words, len(words))
+    return question([rng.choice(FILLERS[:4])] + shuffled)
+
+
+def build(args, rng: random.Random) -> tuple:
+    words = vocabulary(args.vocabulary, rng)
+    index = QuestionIndex(**{**SIMILARITY_CONFIG, "max_entries": args.entries})
+    scopes = [
+        index.scope(PHILOSOPHERS, "English", "fake", f"fake-chat-{i}", None)
+        for i in range(args.scopes)
+    ]
+    asked = []
+    start = time.perf_counter()
+    for i in range(args.entries):
+        content = rng.sample(words, rng.randint(4, 8))
+        scope = scopes[i % len(scopes)]
+        index.add(question(content), scope, {philosopher: "..." for philosopher in PHILOSOPHERS})
+        asked.append((content, scope))
+    return index, words, asked, time.perf_counter() - start
+
+
+def timed_lookups(index: QuestionIndex, queries: list) -> tuple:
+    timings, hits = [], 0
+    for text, scope in queries:
+        start = time.perf_counter()
+        match = index.lookup(text, scope)
+        timings.append(time.perf_counter() - start)
+        hits += match is not None
+    timings.sort()
+    return (
+        statistics.median(timings) * 1e6,
+        timings[int(len(timings) * 0.99)] * 1e6,
+        hits / len(queries),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Near-duplicate question lookup latency in the multi-mode similarity index"
+    )
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--scopes", type=int, default=1, help="1 puts every entry in one scope")
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index, words, asked, build_seconds = build(args, rng)
+    print(
+        f"indexed {len(index.entries)} questions in {len(index.indexes)} scope(s) "
+        f"in {build_seconds:.1f}s ({build_seconds / args.entries * 1e6:.0f} us/add)"
+    )
+    samples = rng.sample(asked, args.queries)
+    workloads = {
+        "paraphrase": [(paraphrase(content, rng), scope) for content, scope in samples],
+        "unseen": [
+            (question(rng.sample(words, rng.randint(4, 8))), scope) for _, scope in samples
+        ],
+    }
+    print(f"{'workload':>10} {'p50 us':>8} {'p99 us':>8} {'hit rate':>9}")
+    for name, queries in workloads.items():
+        p50, p99, hit_rate = timed_lookups(index, queries)
+        print(f"{name:>10} {p50:>8.1f} {p99:>8.1f} {hit_rate:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import threading
+import time
+import tracemalloc
+
+from chat_o_sophy.cache import RESPONSE_CACHE
+from chat_o_sophy.callbacks import STREAMING_CONFIG
+from chat_o_sophy.chatbot import PhilosopherChatbot
+from chat_o_sophy.streaming import StreamResult
+
+PHILOSOPHER = "Plato"
+LANGUAGE = "English"
+
+
+class ThreadSampler:
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def peak_overlap(intervals) -> int:
+    edges = sorted(
+        [(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals]
+    )
+    peak = current = 0
+    for _, delta in edges:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+async def one_stream(args, index: int) -> tuple:
+    chatbot = PhilosopherChatbot(
+        philosopher=PHILOSOPHER,
+        model_provider="fake",
+        model_name="fake-chat",
+        model_version=f"ttft={args.ttft};tps={args.tps};tokens={args.tokens};seed={index}",
+        mode="batch",
+    )
+    first_token = None
+    async for item in chatbot.stream(f"Load test question {index}", LANGUAGE):
+        if isinstance(item, StreamResult):
+            break
+        first_token = first_token or time.perf_counter()
+    return first_token, time.perf_counter()
+
+
+async def run_load(args) -> list:
+    return await asyncio.gather(*(one_stream(args, index) for index in range(args.streams)))
+
+
+def measure(args, async_execution: bool) -> dict:
+    STREAMING_CONFIG["async_execution"] = async_execution
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadSampler() as sampler:
+        intervals = asyncio.run(run_load(args))
+    wall = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_seconds": wall,
+        "streams_per_second": args.streams / wall,
+        "peak_in_flight": peak_overlap(intervals),
+        "peak_threads": sampler.peak,
+        "peak_traced_mb": peak_memory / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Concurrent in-flight generations, thread-pool vs event-loop execution"
+    )
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--tps", type=float, default=50)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    args = parser.parse_args()
+
+    RESPONSE_CACHE.memory.max_size = 0
+    modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+    print(
+        f"{'mode':>6} {'wall s':>8} {'streams/s':>10} {'in-flight':>10} "
+        f"{'threads':>8} {'peak MB':>8}"
+    )
+    for mode in modes:
+        result = measure(args, async_execution=mode == "async")
+        print(
+            f"{mode:>6} {result['wall_seconds']:>8.2f} {result['streams_per_second']:>10.1f} "
+            f"{result['peak_in_flight']:>10} {result['peak_threads']:>8} "
+            f"{result['peak_traced_mb']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
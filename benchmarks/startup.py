@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = ROOT_DIR / "src/chat_o_sophy"
+PAGES = [APP_DIR / "Home.py", *sorted((APP_DIR / "pages").glob("*.py"))]
+PACKAGES = ["streamlit", "langchain", "openai", "replicate"]
+SECRETS = {
+    "openai_api": {"key": "offline"},
+    "replicate_api": {"key": "offline"},
+    "lakera_guard_api": {"key": "offline"},
+}
+
+
+class OfflineAdapter(HTTPAdapter):
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response._content = b"{}"
+        return response
+
+
+def child_env() -> dict:
+    return {**os.environ, "PYTHONPATH": f"{ROOT_DIR / 'src'}:{ROOT_DIR}"}
+
+
+def import_times(page: Path) -> dict:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import runpy; runpy.run_path({str(page)!r})",
+        ],
+        cwd=ROOT_DIR,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+    )
+    total, packages = 0, dict.fromkeys(PACKAGES, 0)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:") :].split("|")
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative)
+        if (package := name.strip().split(".")[0]) in packages:
+            packages[package] += int(self_us)
+    return {"import_ms": total / 1000, **{f"{name}_ms": us / 1000 for name, us in packages.items()}}
+
+
+def first_render(page: Path) -> dict:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--render", str(page)],
+        cwd=ROOT_DIR,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"{page.name} failed to render:\n{result.stderr}")
+    return {
+        **json.loads(result.stdout.splitlines()[-1]),
+        "process_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def render(page: str) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    from utils.http import get_session
+
+    get_session().mount("https://", OfflineAdapter())
+    app = AppTest.from_file(page, default_timeout=120)
+    app.secrets.update(SECRETS)
+    rendered = time.perf_counter()
+    app.run()
+    if app.exception:
+        sys.exit(app.exception[0].message)
+    print(
+        json.dumps(
+            {
+                "first_render_ms": (time.perf_counter() - rendered) * 1000,
+                "modules": len(sys.modules),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import time and time-to-first-render of each Streamlit page, in fresh processes"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the per-page medians to a JSON file")
+    parser.add_argument("--render", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.render:
+        return render(args.render)
+
+    columns = [
+        "import_ms",
+        *(f"{name}_ms" for name in PACKAGES),
+        "first_render_ms",
+        "process_ms",
+        "modules",
+    ]
+    print(f"{'page':>20} " + " ".join(f"{column:>15}" for column in columns))
+    results = {}
+    for page in PAGES:
+        runs = [{**import_times(page), **first_render(page)} for _ in range(args.repeat)]
+        results[page.stem] = {
+            column: statistics.median(run[column] for run in runs) for column in columns
+        }
+        print(
+            f"{page.stem[-20:]:>20} "
+            + " ".join(f"{results[page.stem][column]:>15.1f}" for column in columns)
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
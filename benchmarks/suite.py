@@ -0,0 +1,156 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from itertools import count
+
+from benchmarks.bench_callbacks import CountingContainer, fake_tokens
+from benchmarks.bench_callbacks import run as run_rendering
+from chat_o_sophy.cache import RESPONSE_CACHE
+from chat_o_sophy.chatbot import AssistantChatbot, PhilosopherChatbot
+from chat_o_sophy.concurrency import fan_out
+from chat_o_sophy.history import ChatHistory
+
+PHILOSOPHERS = ["Plato", "Aristotle", "Immanuel Kant", "Karl Marx", "Friedrich Nietzsche"]
+LANGUAGE = "English"
+
+prompt_ids = count()
+
+
+def unique_prompt() -> str:
+    return f"What is the good life? ({next(prompt_ids)})"
+
+
+def fake_model(args, model_name="fake-chat") -> dict:
+    return {
+        "model_provider": "fake",
+        "model_name": model_name,
+        "model_owner": None,
+        "model_version": f"ttft={args.ttft};tps={args.tps};tokens={args.tokens}",
+    }
+
+
+def philosopher_chat(args):
+    chatbot = PhilosopherChatbot(philosopher=PHILOSOPHERS[0], **fake_model(args))
+    chatbot.chat(unique_prompt(), language=LANGUAGE, container=CountingContainer())
+
+
+def multi_mode_fan_out(args):
+    chatbots = [
+        PhilosopherChatbot(philosopher=philosopher, mode="multi", **fake_model(args))
+        for philosopher in PHILOSOPHERS
+    ]
+    fan_out(
+        chatbots=chatbots,
+        containers=[CountingContainer() for _ in chatbots],
+        prompt=unique_prompt(),
+        language=LANGUAGE,
+        max_concurrency=len(chatbots),
+    )
+
+
+def synthesis_history() -> ChatHistory:
+    history = ChatHistory()
+    history.append("human", unique_prompt())
+    for philosopher in PHILOSOPHERS:
+        history.append(philosopher, "".join(fake_tokens(200)))
+    return history
+
+
+def assistant_two_pass(args):
+    assistant = AssistantChatbot(history=synthesis_history(), **fake_model(args))
+    assistant.summary_text(language=LANGUAGE)
+    assistant.summary_table(language=LANGUAGE)
+
+
+def assistant_single_pass(args):
+    assistant = AssistantChatbot(history=synthesis_history(), **fake_model(args))
+    assistant.summary(
+        language=LANGUAGE, containers=(CountingContainer(), CountingContainer())
+    )
+
+
+def callback_rendering(args):
+    run_rendering(fake_tokens(args.tokens), token_delay=0)
+
+
+BENCHMARKS = {
+    "philosopher_chat": philosopher_chat,
+    "multi_mode_fan_out": multi_mode_fan_out,
+    "assistant_two_pass": assistant_two_pass,
+    "assistant_single_pass": assistant_single_pass,
+    "callback_rendering": callback_rendering,
+}
+
+
+def measure(benchmark, args) -> dict:
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        benchmark(args)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "repeat": len(samples),
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min": samples[0],
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    ok = True
+    print(f"{'benchmark':<24} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in results["benchmarks"].items():
+        if (reference := baseline["benchmarks"].get(name)) is None:
+            print(f"{name:<24} {'-':>10} {result['p50']:>10.4f} {'new':>7}")
+            continue
+        ratio = result["p50"] / reference["p50"]
+        flag = " REGRESSION" if ratio > 1 + tolerance else ""
+        ok &= not flag
+        print(
+            f"{name:<24} {reference['p50']:>10.4f} {result['p50']:>10.4f} "
+            f"{ratio:>7.2f}{flag}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks on a deterministic fake streaming LLM"
+    )
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tps", type=float, default=500)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a stored results file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    RESPONSE_CACHE.memory.max_size = 0
+    results = {
+        "python": platform.python_version(),
+        "settings": {"ttft": args.ttft, "tps": args.tps, "tokens": args.tokens},
+        "benchmarks": {},
+    }
+    for name in args.only or BENCHMARKS:
+        results["benchmarks"][name] = measure(BENCHMARKS[name], args)
+        print(f"{name:<24} p50={results['benchmarks'][name]['p50']:.4f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
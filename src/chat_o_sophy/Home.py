@@ -1,6 +1,7 @@
 import streamlit as st
 
 from chat_o_sophy.logo import new_logo
+from chat_o_sophy.prewarm import start_prewarm
 from chat_o_sophy.sidebar import Sidebar
 from utils.logging import configure_logger
 
@@ -12,6 +13,7 @@ st.set_page_config(page_title="chat-o-sophy", page_icon="💭", layout="wide")
 def main():
     sidebar = st.session_state.setdefault("sidebar", Sidebar())
     sidebar.main()
+    start_prewarm()
 
     col1, col2 = st.columns(spec=[0.7, 0.3], gap="large")
     with col1:
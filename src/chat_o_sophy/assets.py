@@ -0,0 +1,82 @@
+import hashlib
+import io
+import random
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Tuple
+
+from PIL import Image
+
+from chat_o_sophy.config import ROOT_DIR
+
+AVATAR_SIZE = (128, 128)
+LOGO_SIZE = (384, 384)
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+
+class AssetService:
+    def __init__(self, root: Path, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index: Dict[str, Dict[str, Path]] = {
+            kind: {path.name: path for path in sorted((root / kind).iterdir())}
+            for kind in ("avatars", "logos")
+        }
+        self.digests: Dict[Tuple[str, str], str] = {}
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_bytes = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def encode(path: Path, size: Tuple[int, int]) -> bytes:
+        with Image.open(path) as image:
+            image = image.convert("RGB")
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=85, optimize=True)
+        return buffer.getvalue()
+
+    def get(self, kind: str, name: str, size: Tuple[int, int]) -> bytes:
+        with self.lock:
+            digest = self.digests.get((kind, name))
+            if digest is not None and digest in self.cache:
+                self.cache.move_to_end(digest)
+                return self.cache[digest]
+
+        content = self.encode(self.index[kind][name], size)
+        digest = hashlib.sha256(content).hexdigest()
+        with self.lock:
+            self.digests[(kind, name)] = digest
+            if digest not in self.cache:
+                self.cache[digest] = content
+                self.cache_bytes += len(content)
+            while self.cache_bytes > self.max_bytes and len(self.cache) > 1:
+                _, evicted = self.cache.popitem(last=False)
+                self.cache_bytes -= len(evicted)
+        return content
+
+    def avatar(self, name: str) -> bytes:
+        return self.get("avatars", name, AVATAR_SIZE)
+
+    def logo(self, name: str) -> bytes:
+        return self.get("logos", name, LOGO_SIZE)
+
+    def random_logo(self) -> str:
+        return random.choice(list(self.index["logos"]))
+
+    def next_logo_path(self) -> Path:
+        with self.lock:
+            idx = max(
+                (int(name.split("_")[-1].split(".")[0]) for name in self.index["logos"]),
+                default=0,
+            )
+        return self.root / "logos" / f"generated_logo_{str(idx + 1).zfill(2)}.png"
+
+    def add_logo(self, path: Path) -> str:
+        with self.lock:
+            self.index["logos"][path.name] = path
+        return path.name
+
+
+ASSETS = AssetService(ROOT_DIR / "assets")
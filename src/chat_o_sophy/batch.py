@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Set, TypedDict, cast, get_args
+
+import utils.type_as as t
+from chat_o_sophy.chatbot import AssistantChatbot, PhilosopherChatbot
+from chat_o_sophy.config import CONFIG
+from chat_o_sophy.history import ChatHistory
+from chat_o_sophy.scheduler import SchedulerBusyError
+from utils.logging import bind_context, configure_logger, trace
+
+logger = configure_logger(__file__)
+
+BUSY_RETRY_DELAY = 1.0
+
+
+class ModelKwargs(TypedDict):
+    model_provider: t.ProviderTypeAs
+    model_name: t.ModelNameTypeAs
+    model_owner: t.ModelOwnerTypeAs
+    model_version: t.ModelVersionTypeAs
+    mode: t.ModeTypeAs
+
+
+def question_id(question: dict) -> str:
+    if "id" in question:
+        return str(question["id"])
+    payload = json.dumps(question, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def read_questions(path: str) -> Iterator[dict]:
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            question = json.loads(line)
+            for field in ("question", "philosophers", "model"):
+                if field not in question:
+                    raise ValueError(f"{path}:{line_number}: missing '{field}'")
+            if question["model"] not in CONFIG.models:
+                raise ValueError(f"{path}:{line_number}: unknown model {question['model']}")
+            if not isinstance(question["philosophers"], list) or not question["philosophers"]:
+                raise ValueError(f"{path}:{line_number}: 'philosophers' must be a non-empty list")
+            if unknown := set(question["philosophers"]) - set(CONFIG.philosophers):
+                raise ValueError(f"{path}:{line_number}: unknown philosophers {unknown}")
+            if question.setdefault("language", "English") not in get_args(t.LanguageTypeAs):
+                raise ValueError(f"{path}:{line_number}: unknown language {question['language']}")
+            question["id"] = question_id(question)
+            yield question
+
+
+def read_checkpoint(path: str, retry_failed: bool) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record["error"] is None or not retry_failed:
+                    done.add(record["id"])
+    return done
+
+
+def with_busy_retry(function, *args, **kwargs):
+    while True:
+        try:
+            return function(*args, **kwargs)
+        except SchedulerBusyError:
+            time.sleep(BUSY_RETRY_DELAY)
+
+
+def answer_question(question: dict, executor: ThreadPoolExecutor) -> dict:
+    model = CONFIG.models[question["model"]]
+    model_kwargs = ModelKwargs(
+        model_provider=cast(t.ProviderTypeAs, model.model_provider),
+        model_name=cast(t.ModelNameTypeAs, model.name),
+        model_owner=cast(t.ModelOwnerTypeAs, model.model_owner),
+        model_version=model.model_version,
+        mode="batch",
+    )
+    language = question["language"]
+    chatbots = [
+        PhilosopherChatbot(philosopher=philosopher, **model_kwargs)
+        for philosopher in question["philosophers"]
+    ]
+    futures = [
+        executor.submit(
+            bind_context(with_busy_retry, chatbot.chat, question["question"], language)
+        )
+        for chatbot in chatbots
+    ]
+    answers: Dict[str, str] = {
+        philosopher: future.result()
+        for philosopher, future in zip(question["philosophers"], futures)
+    }
+
+    synthesis = None
+    if question.get("synthesis", len(chatbots) > 1):
+        history = ChatHistory()
+        history.append("human", question["question"])
+        for philosopher, answer in answers.items():
+            history.append(philosopher, answer)
+        assistant = AssistantChatbot(history=history, **model_kwargs)
+        if assistant.synthesis_mode == "single_pass":
+            text, table = with_busy_retry(assistant.summary, language)
+            table = table or with_busy_retry(assistant.summary_table, language)
+        else:
+            text = with_busy_retry(assistant.summary_text, language)
+            table = with_busy_retry(assistant.summary_table, language)
+        synthesis = {"text": text, "table": table}
+    return {"answers": answers, "synthesis": synthesis}
+
+
+def run_batch(questions: List[dict], output: str, workers: int) -> Dict[str, int]:
+    lock = threading.Lock()
+    counts = {"done": 0, "failed": 0}
+
+    def process(question: dict) -> None:
+        start = time.perf_counter()
+        record = {key: question[key] for key in ("id", "question", "philosophers", "language", "model")}
+        with trace() as trace_id:
+            try:
+                record.update(answer_question(question, answer_executor), error=None)
+            except Exception as exception:
+                logger.exception(f"Question {question['id']} failed")
+                record.update(answers=None, synthesis=None, error=repr(exception))
+        record["trace_id"] = trace_id
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with lock:
+            f.write(line)
+            f.flush()
+            counts["failed" if record["error"] else "done"] += 1
+
+    with open(output, "a") as f, ThreadPoolExecutor(
+        max_workers=workers * max(len(question["philosophers"]) for question in questions),
+        thread_name_prefix="batch_answer",
+    ) as answer_executor, ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="batch_question"
+    ) as question_executor:
+        futures = [question_executor.submit(process, question) for question in questions]
+        for index, future in enumerate(as_completed(futures), 1):
+            future.result()
+            if index % 10 == 0 or index == len(futures):
+                logger.info(f"Batch progress: {index}/{len(futures)}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a JSONL file of questions through the philosopher chatbots"
+    )
+    parser.add_argument("input", help="JSONL questions: question, philosophers, model, language")
+    parser.add_argument("output", help="JSONL answers, also used as the resume checkpoint")
+    parser.add_argument("--workers", type=int, default=8, help="Questions processed in parallel")
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="Re-run questions recorded with an error"
+    )
+    args = parser.parse_args()
+
+    questions = list(read_questions(args.input))
+    done = read_checkpoint(args.output, args.retry_failed)
+    pending = [question for question in questions if question["id"] not in done]
+    for provider in {CONFIG.models[question["model"]].model_provider for question in pending}:
+        if provider in CONFIG.providers and not os.environ.get(CONFIG.providers[provider].env_var):
+            parser.error(f"Set {CONFIG.providers[provider].env_var} to run {provider} models")
+
+    logger.info(f"{len(pending)} questions to run, {len(questions) - len(pending)} already done")
+    if pending:
+        counts = run_batch(pending, args.output, args.workers)
+        logger.info(f"Batch done: {counts['done']} answered, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, Tuple, TypeVar
+
+from chat_o_sophy.config import ROOT_DIR, load_yaml
+from utils.logging import configure_logger
+
+logger = configure_logger(__file__)
+
+CACHE_CONFIG = load_yaml("config/cache.yaml")
+
+V = TypeVar("V")
+
+
+def cache_key(
+    model_provider, model_name, model_version, philosopher, language, history, prompt
+) -> str:
+    payload = json.dumps(
+        [model_provider, model_name, model_version, philosopher, language, history, prompt],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LRUCache(Generic[V]):
+    def __init__(self, max_size: int, ttl: Optional[float]):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[V, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[V]:
+        with self.lock:
+            if (entry := self.entries.get(key)) is None:
+                return None
+            value, created_at = entry
+            if self.ttl and time.time() - created_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: V) -> None:
+        with self.lock:
+            self.entries[key] = (value, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+class SQLiteCache:
+    def __init__(self, path: str, ttl: Optional[float]):
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl and time.time() - created_at > self.ttl:
+            return None
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self.connection.commit()
+
+
+class ResponseCache:
+    def __init__(self, memory: LRUCache[str], sqlite: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.sqlite = sqlite
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ResponseCache":
+        memory: LRUCache[str] = LRUCache(**config["memory"])
+        sqlite = None
+        if config["sqlite"]["enabled"]:
+            sqlite = SQLiteCache(
+                path=str(ROOT_DIR / config["sqlite"]["path"]),
+                ttl=config["sqlite"]["ttl"],
+            )
+        return cls(memory=memory, sqlite=sqlite)
+
+    def lookup(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is None and self.sqlite is not None:
+            if (value := self.sqlite.get(key)) is not None:
+                self.memory.set(key, value)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.lookup(key) is not None
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.lookup(key)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.sqlite is not None:
+            self.sqlite.set(key, value)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.memory.entries),
+        }
+
+
+RESPONSE_CACHE = ResponseCache.from_config(CACHE_CONFIG)
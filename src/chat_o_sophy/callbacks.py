@@ -1,29 +1,212 @@
-import streamlit as st
+import random
+import re
+import time
+from typing import TYPE_CHECKING, Optional
+from uuid import uuid4
+
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain.callbacks.manager import CallbackManager
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from langchain.schema import LLMResult
+from langchain.schema import Generation, LLMResult, get_buffer_string
+
+from chat_o_sophy.config import load_yaml
+from chat_o_sophy.metrics import MetricsCallbackHandler
+from utils.logging import LOGGING_CONFIG, configure_logger
+from utils.tokens import count_tokens
+
+if TYPE_CHECKING:
+    from streamlit.delta_generator import DeltaGenerator
+
+logger = configure_logger(__file__)
+
+STREAMING_CONFIG = load_yaml("config/streaming.yaml")
+
+
+def new_placeholder():
+    import streamlit as st
+
+    return st.empty()
 
 
 class StreamingChatCallbackHandler(BaseCallbackHandler):
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        container=None,
+        guard=None,
+        buffered: bool = STREAMING_CONFIG["buffered"],
+        flush_interval: float = STREAMING_CONFIG["flush_interval"],
+        flush_bytes: int = STREAMING_CONFIG["flush_bytes"],
+    ):
+        self.placeholder = container
+        self.container: Optional["DeltaGenerator"] = None
+        self.guard = guard
+        self.raise_error = guard is not None
+        self.buffered = buffered
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+
+    def target(self) -> "DeltaGenerator":
+        if self.container is None:
+            self.container = self.placeholder or new_placeholder()
+        return self.container
+
+    def on_queue_position(self, position: int):
+        if position:
+            self.target().caption(f"Waiting for the model... (position {position} in queue)")
+        else:
+            self.target().empty()
 
     def on_llm_start(self, *args, **kwargs):
-        self.container = st.empty()
+        self.target()
         self.text = ""
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+        self.released = self.guard is None
 
     def on_llm_new_token(self, token: str, *args, **kwargs):
         self.text += token
-        self.container.markdown(self.text, unsafe_allow_html=True)
+        self.pending_bytes += len(token.encode())
+        if not self.released:
+            if not self.guard.done():
+                return
+            self.guard.check()
+            self.released = True
+        if (
+            not self.buffered
+            or self.pending_bytes >= self.flush_bytes
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def render(self, text: str):
+        self.target().markdown(text, unsafe_allow_html=True)
+
+    def flush(self):
+        if self.pending_bytes:
+            self.render(self.text)
+            self.pending_bytes = 0
+            self.last_flush = time.monotonic()
+
+    def on_llm_end(self, response: LLMResult, *args, **kwargs):
+        if not self.released:
+            self.guard.check()
+            self.released = True
+        self.target().empty()
+        self.render(response.generations[0][0].text)
+
+    def on_llm_error(self, error: BaseException, *args, **kwargs):
+        if self.released:
+            self.flush()
+        else:
+            self.target().empty()
+
+
+class SplitStreamingCallbackHandler(StreamingChatCallbackHandler):
+    def __init__(self, separator: str, containers=None, **kwargs):
+        super().__init__(container=containers[0] if containers else None, **kwargs)
+        self.separator = separator
+        self.containers = containers
+
+    def on_llm_start(self, *args, **kwargs):
+        super().on_llm_start(*args, **kwargs)
+        self.containers = self.containers or (self.container, new_placeholder())
+
+    def render(self, text: str):
+        head, separator, tail = text.partition(self.separator)
+        if not separator:
+            for end in range(len(self.separator) - 1, 0, -1):
+                if head.endswith(self.separator[:end]):
+                    head = head[:-end]
+                    break
+        self.containers[0].markdown(head.strip(), unsafe_allow_html=True)
+        if tail:
+            self.containers[1].markdown(tail.strip(), unsafe_allow_html=True)
+
+
+class PromptTokenCallbackHandler(BaseCallbackHandler):
+    run_inline = True
+
+    def __init__(self, prompt_tokens: list):
+        self.prompt_tokens = prompt_tokens
+
+    def on_llm_start(self, serialized, prompts, *args, **kwargs):
+        self.prompt_tokens.append(sum(count_tokens(prompt) for prompt in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *args, **kwargs):
+        self.prompt_tokens.append(
+            sum(count_tokens(message.content) for batch in messages for message in batch)
+        )
+
+
+class LogCallbackHandler(BaseCallbackHandler):
+    run_inline = True
+
+    def __init__(self, labels: dict, sample_rate: float = LOGGING_CONFIG["token_sample_rate"]):
+        self.labels = labels
+        self.sample_rate = sample_rate
+
+    def start(self, prompt: str) -> None:
+        self.sampled = random.random() < self.sample_rate
+        self.streamed_tokens = 0
+        logger.info("Generation started", extra=self.labels)
+        if self.sampled:
+            logger.info("Generation prompt", extra={**self.labels, "prompt": prompt})
+
+    def on_llm_start(self, serialized, prompts, *args, **kwargs):
+        self.start("\n\n".join(prompts))
+
+    def on_chat_model_start(self, serialized, messages, *args, **kwargs):
+        self.start("\n\n".join(get_buffer_string(batch) for batch in messages))
+
+    def on_llm_new_token(self, token: str, *args, **kwargs):
+        if self.sampled:
+            logger.info(
+                "Generation token",
+                extra={**self.labels, "index": self.streamed_tokens, "token": token},
+            )
+        self.streamed_tokens += 1
 
     def on_llm_end(self, response: LLMResult, *args, **kwargs):
-        self.container.empty()
-        self.container.markdown(response.generations[0][0].text, unsafe_allow_html=True)
+        logger.info(
+            "Generation finished",
+            extra={
+                **self.labels,
+                "streamed_tokens": self.streamed_tokens,
+                "characters": len(response.generations[0][0].text),
+            },
+        )
+
+    def on_llm_error(self, error: BaseException, *args, **kwargs):
+        logger.error("Generation failed", extra={**self.labels, "error": repr(error)})
+
+
+def render_handlers(container=None, guard=None, separator=None) -> list:
+    if separator is None:
+        chat_handler = StreamingChatCallbackHandler(container=container, guard=guard)
+    else:
+        chat_handler = SplitStreamingCallbackHandler(
+            separator=separator, containers=container, guard=guard
+        )
+    return [chat_handler]
 
 
 class CustomCallbackManager(CallbackManager):
-    def __init__(self):
-        chat_handler = StreamingChatCallbackHandler()
-        stdout_handler = StreamingStdOutCallbackHandler()
-        super().__init__(handlers=[chat_handler, stdout_handler])
+    def __init__(self, prompt_tokens=None, metric_labels=None):
+        handlers = []
+        if prompt_tokens is not None:
+            handlers.append(PromptTokenCallbackHandler(prompt_tokens))
+        if metric_labels is not None:
+            handlers.append(MetricsCallbackHandler(metric_labels))
+            handlers.append(LogCallbackHandler(metric_labels))
+        super().__init__(handlers=handlers)
+
+
+def replay(handlers: list, text: str) -> None:
+    run_id = uuid4()
+    for handler in handlers:
+        handler.on_llm_start(serialized={}, prompts=[], run_id=run_id)
+    for token in re.findall(r"\s*\S+", text):
+        for handler in handlers:
+            handler.on_llm_new_token(token, run_id=run_id)
+    response = LLMResult(generations=[[Generation(text=text)]])
+    for handler in handlers:
+        handler.on_llm_end(response, run_id=run_id)
@@ -1,22 +1,31 @@
-from functools import cached_property
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property, partial
+from typing import List, Optional, Tuple
 
-import yaml
 from langchain.callbacks.manager import CallbackManager
 from langchain.chains import LLMChain
-from langchain.chat_models import ChatOpenAI
-from langchain.chat_models.base import BaseChatModel
-from langchain.llms import Replicate
 from langchain.memory import ConversationBufferMemory
-from langchain.prompts import (ChatPromptTemplate, HumanMessagePromptTemplate,
-                               MessagesPlaceholder,
-                               SystemMessagePromptTemplate)
-from langchain.schema.messages import AIMessage, HumanMessage
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema.language_model import BaseLanguageModel
 
 import utils.type_as as t
-from chat_o_sophy.callbacks import CustomCallbackManager
+from chat_o_sophy.cache import RESPONSE_CACHE, cache_key
+from chat_o_sophy.callbacks import (CustomCallbackManager, render_handlers,
+                                    replay)
+from chat_o_sophy.config import CONFIG
+from chat_o_sophy.history import ChatHistory
+from chat_o_sophy.llm_registry import LLM_REGISTRY
+from chat_o_sophy.memory import TokenWindowMemory
+from chat_o_sophy.scheduler import SCHEDULER, current_session_id
+from chat_o_sophy.singleflight import SINGLE_FLIGHT
+from chat_o_sophy.store import ConversationStore
+from chat_o_sophy.streaming import StreamResult, TokenStream, consume
+from utils.logging import bind_context, configure_logger, trace
 
-with open("data/prompts.yaml") as f:
-    PROMPTS = yaml.safe_load(f)
+logger = configure_logger(__file__)
+
+SUMMARY_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memory_summary")
 
 
 class Chatbot:
@@ -28,6 +37,7 @@ class Chatbot:
         model_name: t.ModelNameTypeAs,
         model_owner: t.ModelOwnerTypeAs = None,
         model_version: t.ModelVersionTypeAs = None,
+        mode: t.ModeTypeAs = "single",
     ) -> None:
         self.bot_type = bot_type
         self.philosopher = philosopher
@@ -35,47 +45,53 @@ class Chatbot:
         self.model_name = model_name
         self.model_owner = model_owner
         self.model_version = model_version
+        self.mode = mode
+        self.session_id = current_session_id()
+        self.prompt_tokens: List[int] = []
 
-    @cached_property
+    @property
     def template(self) -> ChatPromptTemplate:
-        return ChatPromptTemplate.from_messages(
-            [
-                SystemMessagePromptTemplate.from_template(
-                    PROMPTS[self.bot_type]["system_message"]
-                ),
-                MessagesPlaceholder(variable_name="history"),
-                HumanMessagePromptTemplate.from_template("{input}"),
-                SystemMessagePromptTemplate.from_template(
-                    "<Your answer in {language}:>"
-                ),
-            ]
-        )
+        return CONFIG.prompts.templates[self.bot_type]
 
     @cached_property
     def memory(self) -> ConversationBufferMemory:
         return ConversationBufferMemory(
+            chat_memory=ChatHistory(),
             memory_key="history",
             input_key="input",
             return_messages=True,
         )
 
-    @property
     def callback_manager(self) -> CallbackManager:
-        return CustomCallbackManager()
+        return CustomCallbackManager(
+            prompt_tokens=self.prompt_tokens,
+            metric_labels=self.metric_labels,
+        )
+
+    def render(
+        self, stream: TokenStream, container=None, guard=None, separator=None
+    ) -> StreamResult:
+        handlers = [] if self.mode == "batch" else render_handlers(container, guard, separator)
+        with trace():
+            return consume(stream, handlers)
+
+    @property
+    def metric_labels(self) -> dict:
+        return {
+            "provider": self.model_provider,
+            "model": self.model_name,
+            "philosopher": self.philosopher or self.bot_type,
+            "mode": self.mode,
+        }
 
     @cached_property
-    def llm(self) -> BaseChatModel:
-        if self.model_provider == "openai":
-            return ChatOpenAI(
-                model=self.model_name,
-                streaming=True,
-            )
-        elif self.model_provider == "replicate":
-            return Replicate(
-                model=f"{self.model_owner}/{self.model_name}:{self.model_version}",
-                streaming=True,
-                model_kwargs={"max_length": 8192},
-            )
+    def llm(self) -> BaseLanguageModel:
+        return LLM_REGISTRY.get(
+            model_provider=self.model_provider,
+            model_name=self.model_name,
+            model_owner=self.model_owner,
+            model_version=self.model_version,
+        )
 
     @cached_property
     def chain(self) -> LLMChain:
@@ -83,9 +99,23 @@ class Chatbot:
             llm=self.llm,
             memory=self.memory,
             prompt=self.template,
-            verbose=True,
         )
 
+    def run(self, callbacks: list, **inputs) -> str:
+        with SCHEDULER.slot(self.model_provider, self.session_id, inputs, callbacks):
+            return self.chain.run(callbacks=callbacks, **inputs)
+
+    async def arun(self, callbacks: list, **inputs) -> str:
+        async with SCHEDULER.aslot(self.model_provider, self.session_id, inputs, callbacks):
+            return await self.chain.arun(callbacks=callbacks, **inputs)
+
+    def predict(self, text: str) -> str:
+        handlers = CustomCallbackManager(
+            metric_labels={**self.metric_labels, "mode": "summary"}
+        ).handlers
+        with SCHEDULER.slot(self.model_provider, self.session_id, {"text": text}, handlers):
+            return self.llm.predict(text, callbacks=handlers)
+
 
 class PhilosopherChatbot(Chatbot):
     def __init__(
@@ -95,6 +125,11 @@ class PhilosopherChatbot(Chatbot):
         model_name: t.ModelNameTypeAs,
         model_owner: t.ModelOwnerTypeAs = None,
         model_version: t.ModelVersionTypeAs = None,
+        mode: t.ModeTypeAs = "single",
+        history: Optional[ChatHistory] = None,
+        memory_state: Optional[dict] = None,
+        conversation_id: Optional[str] = None,
+        store: Optional[ConversationStore] = None,
     ) -> None:
         super().__init__(
             bot_type="philosopher",
@@ -103,42 +138,208 @@ class PhilosopherChatbot(Chatbot):
             model_name=model_name,
             model_owner=model_owner,
             model_version=model_version,
+            mode=mode,
         )
-        self.history: t.ChatHistoryTypeAs = []
+        self.history = history if history is not None else ChatHistory()
+        self.initial_memory_state = memory_state or {}
+        self.conversation_id = conversation_id
+        self.store = store
+        self.summarizing: Optional[Future] = None
 
-    def greet(self, language: t.LanguageTypeAs) -> str:
+    @cached_property
+    def memory(self) -> ConversationBufferMemory:
+        model = CONFIG.models.get(self.model_name)
+        if model is None or model.memory.strategy != "window":
+            return ConversationBufferMemory(
+                chat_memory=self.history,
+                memory_key="history",
+                input_key="input",
+                return_messages=True,
+            )
+        return TokenWindowMemory(
+            chat_memory=self.history,
+            memory_key="history",
+            input_key="input",
+            return_messages=True,
+            max_tokens=model.memory.max_tokens,
+            summarizer=self.predict if model.memory.summarize else None,
+            summary_prompt=CONFIG.prompts.memory_summary,
+            **self.initial_memory_state,
+        )
+
+    @property
+    def memory_state(self) -> dict:
+        memory = self.__dict__.get("memory")
+        if not isinstance(memory, TokenWindowMemory):
+            return self.initial_memory_state
+        return {"summary": memory.summary, "window_start": memory.window_start}
+
+    def state(self, language: t.LanguageTypeAs) -> dict:
+        return {
+            "philosopher": self.philosopher,
+            "language": language,
+            "model_provider": self.model_provider,
+            "model_name": self.model_name,
+            "model_owner": self.model_owner,
+            "model_version": self.model_version,
+            "memory_state": self.memory_state,
+        }
+
+    @cached_property
+    def chain(self) -> LLMChain:
+        return LLMChain(llm=self.llm, prompt=self.template)
+
+    @property
+    def greetings_prompt(self) -> str:
+        return CONFIG.prompts.greetings
+
+    def greet(self, language: t.LanguageTypeAs, container=None) -> str:
+        self.history.offset = 1
         return self.chat(
-            prompt=PROMPTS["philosopher"]["greetings"],
+            prompt=self.greetings_prompt,
             language=language,
+            container=container,
         )
 
-    def chat(self, prompt: str, language: t.LanguageTypeAs) -> str:
-        response = self.chain.run(
+    def cache_key(self, prompt: str, language: t.LanguageTypeAs) -> str:
+        return cache_key(
+            model_provider=self.model_provider,
+            model_name=self.model_name,
+            model_version=self.model_version,
+            philosopher=self.philosopher,
+            language=language,
+            history=self.history.digest,
+            prompt=prompt,
+        )
+
+    def prewarm_greeting(self, language: t.LanguageTypeAs) -> bool:
+        prompt = self.greetings_prompt
+        key = self.cache_key(prompt, language)
+        if key in RESPONSE_CACHE:
+            return False
+        response = self.generate(prompt, language, self.memory.buffer_as_messages, callbacks=[])
+        RESPONSE_CACHE.set(key, response)
+        return True
+
+    def generate(
+        self, prompt: str, language: t.LanguageTypeAs, history: list, callbacks: list
+    ) -> str:
+        return self.run(
+            callbacks + self.callback_manager().handlers,
+            input=prompt,
+            philosopher=self.philosopher,
+            language=language,
+            history=history,
+        )
+
+    async def agenerate(
+        self, prompt: str, language: t.LanguageTypeAs, history: list, callbacks: list
+    ) -> str:
+        return await self.arun(
+            callbacks + self.callback_manager().handlers,
             input=prompt,
             philosopher=self.philosopher,
             language=language,
-            callbacks=self.callback_manager.handlers,
+            history=history,
+        )
+
+    def respond(
+        self,
+        prompt: str,
+        language: t.LanguageTypeAs,
+        handlers: list,
+        guard=None,
+        use_cache: bool = True,
+    ) -> StreamResult:
+        if self.summarizing is not None:
+            self.summarizing.result()
+        key = self.cache_key(prompt, language)
+        response = RESPONSE_CACHE.get(key) if use_cache else None
+        if cached := response is not None:
+            replay(handlers, response)
+        else:
+            generate = partial(self.generate, prompt, language, self.memory.buffer_as_messages)
+            response = SINGLE_FLIGHT.run(key, generate, handlers)
+        if guard is not None:
+            guard.check()
+        if not cached:
+            RESPONSE_CACHE.set(key, response)
+        self.commit(prompt, language, response)
+        return StreamResult(text=response, cached=cached)
+
+    async def arespond(
+        self,
+        prompt: str,
+        language: t.LanguageTypeAs,
+        handlers: list,
+        guard=None,
+        use_cache: bool = True,
+    ) -> StreamResult:
+        if self.summarizing is not None:
+            await asyncio.wrap_future(self.summarizing)
+        key = self.cache_key(prompt, language)
+        response = RESPONSE_CACHE.get(key) if use_cache else None
+        if cached := response is not None:
+            replay(handlers, response)
+        else:
+            agenerate = partial(self.agenerate, prompt, language, self.memory.buffer_as_messages)
+            response = await SINGLE_FLIGHT.arun(key, agenerate, handlers)
+        if guard is not None:
+            await asyncio.to_thread(guard.check)
+        if not cached:
+            RESPONSE_CACHE.set(key, response)
+        await asyncio.to_thread(self.commit, prompt, language, response)
+        return StreamResult(text=response, cached=cached)
+
+    def commit(self, prompt: str, language: t.LanguageTypeAs, response: str) -> None:
+        self.memory.save_context({"input": prompt}, {"text": response})
+        self.save(language)
+        memory = self.memory
+        if isinstance(memory, TokenWindowMemory) and memory.summarizer is not None:
+            self.summarizing = SUMMARY_EXECUTOR.submit(
+                bind_context(self.summarize, memory, language)
+            )
+
+    def save(self, language: t.LanguageTypeAs) -> None:
+        if self.store is not None and self.conversation_id is not None:
+            self.store.save(self.conversation_id, self.state(language), self.history)
+
+    def summarize(self, memory: TokenWindowMemory, language: t.LanguageTypeAs) -> None:
+        try:
+            if memory.summarize():
+                self.save(language)
+        except Exception:
+            logger.exception("Memory summary failed, keeping the full window")
+
+    def stream(
+        self, prompt: str, language: t.LanguageTypeAs, guard=None, use_cache: bool = True
+    ) -> TokenStream:
+        return TokenStream(
+            partial(self.respond, prompt, language, guard=guard, use_cache=use_cache),
+            partial(self.arespond, prompt, language, guard=guard, use_cache=use_cache),
         )
-        self.update_history()
-        return response
 
-    def update_history(self) -> None:
-        self.history = []
-        for message in self.memory.chat_memory.messages[1:]:
-            if isinstance(message, AIMessage):
-                self.history.append({"role": "ai", "content": message.content})
-            elif isinstance(message, HumanMessage):
-                self.history.append({"role": "human", "content": message.content})
+    def chat(
+        self,
+        prompt: str,
+        language: t.LanguageTypeAs,
+        container=None,
+        guard=None,
+        use_cache: bool = True,
+    ) -> str:
+        stream = self.stream(prompt, language, guard, use_cache)
+        return self.render(stream, container, guard).text
 
 
 class AssistantChatbot(Chatbot):
     def __init__(
         self,
-        history: t.ChatHistoryTypeAs,
+        history: ChatHistory,
         model_provider: t.ProviderTypeAs,
         model_name: t.ModelNameTypeAs,
         model_owner: t.ModelOwnerTypeAs,
         model_version: t.ModelVersionTypeAs,
+        mode: t.ModeTypeAs = "multi",
     ):
         super().__init__(
             philosopher=None,
@@ -147,28 +348,70 @@ class AssistantChatbot(Chatbot):
             model_name=model_name,
             model_owner=model_owner,
             model_version=model_version,
+            mode=mode,
         )
         self.history = history
 
     @property
     def history_str(self) -> str:
-        history_str = [f"Question: {self.history[0]['content']}"]
-        for message in self.history[1:]:
-            content = " ".join(message["content"].split("\n"))
-            response = f"\t{message['role']}'s response: {content}"
+        question, *answers = self.history
+        history_str = [f"Question: {question.content}"]
+        for message in answers:
+            content = " ".join(message.content.split("\n"))
+            response = f"\t{message.role}'s response: {content}"
             history_str.append(response)
         return "\n\n".join(history_str)
 
-    def summary_text(self, language: t.LanguageTypeAs) -> str:
-        return self.chain.run(
-            input=PROMPTS["assistant"]["summary_text"] + self.history_str,
+    @property
+    def synthesis_mode(self) -> str:
+        model = CONFIG.models.get(self.model_name)
+        return model.synthesis if model else "two_pass"
+
+    def prompt(self, task: t.SynthesisTaskTypeAs) -> str:
+        if task == "summary":
+            return CONFIG.prompts.summary_structured + self.history_str
+        if task == "summary_text":
+            return CONFIG.prompts.summary_text + self.history_str
+        return CONFIG.prompts.summary_table
+
+    def respond(
+        self, task: t.SynthesisTaskTypeAs, language: t.LanguageTypeAs, handlers: list
+    ) -> StreamResult:
+        response = self.run(
+            handlers + self.callback_manager().handlers,
+            input=self.prompt(task),
             language=language,
-            callbacks=self.callback_manager.handlers,
         )
+        return StreamResult(text=response)
 
-    def summary_table(self, language: t.LanguageTypeAs) -> str:
-        return self.chain.run(
-            input=PROMPTS["assistant"]["summary_table"],
+    async def arespond(
+        self, task: t.SynthesisTaskTypeAs, language: t.LanguageTypeAs, handlers: list
+    ) -> StreamResult:
+        response = await self.arun(
+            handlers + self.callback_manager().handlers,
+            input=self.prompt(task),
             language=language,
-            callbacks=self.callback_manager.handlers,
         )
+        return StreamResult(text=response)
+
+    def stream(
+        self, language: t.LanguageTypeAs, task: t.SynthesisTaskTypeAs = "summary"
+    ) -> TokenStream:
+        return TokenStream(
+            partial(self.respond, task, language),
+            partial(self.arespond, task, language),
+        )
+
+    def summary(self, language: t.LanguageTypeAs, containers=None) -> Tuple[str, str]:
+        separator = CONFIG.prompts.synthesis_separator
+        result = self.render(
+            self.stream(language, "summary"), containers, separator=separator
+        )
+        text, _, table = result.text.partition(separator)
+        return text.strip(), table.strip()
+
+    def summary_text(self, language: t.LanguageTypeAs) -> str:
+        return self.render(self.stream(language, "summary_text")).text
+
+    def summary_table(self, language: t.LanguageTypeAs) -> str:
+        return self.render(self.stream(language, "summary_table")).text
@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List
+
+from streamlit.runtime.scriptrunner import (add_script_run_ctx,
+                                            get_script_run_ctx)
+
+import utils.type_as as t
+from utils.logging import bind_context, configure_logger
+
+if TYPE_CHECKING:
+    from chat_o_sophy.chatbot import PhilosopherChatbot
+
+logger = configure_logger(__file__)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60 / requests_per_minute
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        time.sleep(slot - now)
+
+
+def fan_out(
+    chatbots: List["PhilosopherChatbot"],
+    containers: list,
+    prompt: str,
+    language: t.LanguageTypeAs,
+    max_concurrency: int,
+    guard=None,
+    use_cache: bool = True,
+) -> List[str]:
+    ctx = get_script_run_ctx()
+
+    def attach_script_run_ctx():
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(chatbots), max_concurrency)),
+        thread_name_prefix="fan_out",
+        initializer=attach_script_run_ctx,
+    ) as executor:
+        futures = [
+            executor.submit(
+                bind_context(
+                    chatbot.chat,
+                    prompt=prompt,
+                    language=language,
+                    container=container,
+                    guard=guard,
+                    use_cache=use_cache,
+                )
+            )
+            for chatbot, container in zip(chatbots, containers)
+        ]
+        return [future.result() for future in futures]
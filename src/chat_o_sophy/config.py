@@ -0,0 +1,203 @@
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Dict, Mapping, Optional, Tuple
+
+import yaml
+
+if TYPE_CHECKING:
+    from langchain.prompts import ChatPromptTemplate
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+def load_yaml(relative_path: str) -> dict:
+    with open(ROOT_DIR / relative_path) as f:
+        return yaml.safe_load(f)
+
+
+def compile_template(system_message: str) -> "ChatPromptTemplate":
+    from langchain.prompts import (ChatPromptTemplate,
+                                   HumanMessagePromptTemplate,
+                                   MessagesPlaceholder,
+                                   SystemMessagePromptTemplate)
+
+    return ChatPromptTemplate.from_messages(
+        [
+            SystemMessagePromptTemplate.from_template(system_message),
+            MessagesPlaceholder(variable_name="history"),
+            HumanMessagePromptTemplate.from_template("{input}"),
+            SystemMessagePromptTemplate.from_template("<Your answer in {language}:>"),
+        ]
+    )
+
+
+@dataclass(frozen=True)
+class Prompts:
+    templates: Mapping[str, "ChatPromptTemplate"]
+    greetings: str
+    summary_text: str
+    summary_table: str
+    summary_structured: str
+    synthesis_separator: str
+    memory_summary: str
+
+    @classmethod
+    def from_dict(cls, prompts: dict) -> "Prompts":
+        return cls(
+            templates=MappingProxyType(
+                {
+                    bot_type: compile_template(prompts[bot_type]["system_message"])
+                    for bot_type in ("philosopher", "assistant")
+                }
+            ),
+            greetings=prompts["philosopher"]["greetings"],
+            summary_text=prompts["assistant"]["summary_text"],
+            summary_table=prompts["assistant"]["summary_table"],
+            summary_structured=prompts["assistant"]["summary_structured"],
+            synthesis_separator=prompts["assistant"]["synthesis_separator"],
+            memory_summary=prompts["memory"]["summary"],
+        )
+
+
+@dataclass(frozen=True)
+class Philosopher:
+    name: str
+    first_name: str
+    surname: Optional[str]
+    avatar: str
+
+    def __post_init__(self):
+        if not (ROOT_DIR / "assets/avatars" / self.avatar).is_file():
+            raise ValueError(f"Missing avatar for {self.name}: {self.avatar}")
+
+
+@dataclass(frozen=True)
+class MemoryConfig:
+    strategy: str = "buffer"
+    max_tokens: int = 2000
+    summarize: bool = False
+
+    def __post_init__(self):
+        if self.strategy not in ("buffer", "window"):
+            raise ValueError(f"Unknown memory strategy: {self.strategy}")
+        if self.max_tokens <= 0:
+            raise ValueError("Memory max_tokens must be positive")
+
+
+@dataclass(frozen=True)
+class Model:
+    name: str
+    model_provider: str
+    model_owner: Optional[str]
+    model_version: Optional[str]
+    experimental_flag: bool
+    memory: MemoryConfig
+    synthesis: str = "two_pass"
+
+    def __post_init__(self):
+        if self.synthesis not in ("single_pass", "two_pass"):
+            raise ValueError(f"Unknown synthesis mode for {self.name}: {self.synthesis}")
+
+
+@dataclass(frozen=True)
+class Provider:
+    name: str
+    label: str
+    api_help: str
+    env_var: str
+    max_concurrency: int
+    requests_per_minute: float
+    tokens_per_minute: float
+
+    def __post_init__(self):
+        if min(self.max_concurrency, self.requests_per_minute, self.tokens_per_minute) <= 0:
+            raise ValueError(f"Provider {self.name} limits must be positive")
+
+
+def load_prompts(path: str) -> Prompts:
+    return Prompts.from_dict(load_yaml(path))
+
+
+def load_philosophers(path: str) -> Mapping[str, Philosopher]:
+    return MappingProxyType(
+        {
+            name: Philosopher(
+                name=name,
+                first_name=info["name"],
+                surname=info["surname"],
+                avatar=info["avatar"],
+            )
+            for name, info in load_yaml(path).items()
+        }
+    )
+
+
+def load_models(path: str) -> Mapping[str, Model]:
+    return MappingProxyType(
+        {
+            name: Model(
+                name=name,
+                model_provider=info["model_provider"],
+                model_owner=info["model_owner"],
+                model_version=info["model_version"],
+                experimental_flag=info["experimental_flag"],
+                memory=MemoryConfig(**info.get("memory", {})),
+                synthesis=info.get("synthesis", "two_pass"),
+            )
+            for name, info in load_yaml(path).items()
+        }
+    )
+
+
+def load_providers(path: str) -> Mapping[str, Provider]:
+    return MappingProxyType(
+        {name: Provider(name=name, **info) for name, info in load_yaml(path).items()}
+    )
+
+
+class ConfigRegistry:
+    def __init__(self, sources: Mapping[str, Tuple[str, Callable]]):
+        self.sources = sources
+        self.entries: Dict[str, tuple] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str):
+        path, loader = self.sources[name]
+        mtime = os.stat(ROOT_DIR / path).st_mtime_ns
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != mtime:
+            with self.lock:
+                entry = self.entries.get(name)
+                if entry is None or entry[0] != mtime:
+                    entry = (mtime, loader(path))
+                    self.entries[name] = entry
+        return entry[1]
+
+    @property
+    def prompts(self) -> Prompts:
+        return self.get("prompts")
+
+    @property
+    def philosophers(self) -> Mapping[str, Philosopher]:
+        return self.get("philosophers")
+
+    @property
+    def models(self) -> Mapping[str, Model]:
+        return self.get("models")
+
+    @property
+    def providers(self) -> Mapping[str, Provider]:
+        return self.get("providers")
+
+
+SOURCES: Dict[str, Tuple[str, Callable]] = {
+    "prompts": ("data/prompts.yaml", load_prompts),
+    "philosophers": ("data/philosophers.yaml", load_philosophers),
+    "models": ("config/models.yaml", load_models),
+    "providers": ("config/providers.yaml", load_providers),
+}
+
+CONFIG = ConfigRegistry(SOURCES)
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Coroutine, Optional
+
+from utils.logging import TRACE_ID, configure_logger, traced
+
+logger = configure_logger(__file__)
+
+
+class EventLoopThread:
+    def __init__(self, name: str = "event_loop"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lock = threading.Lock()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=loop.run_forever, name=self.name, daemon=True
+                    ).start()
+                    self.loop = loop
+        return self.loop
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(
+            traced(coroutine, TRACE_ID.get()), self.get_loop()
+        )
+
+
+EVENT_LOOP = EventLoopThread()
@@ -0,0 +1,131 @@
+import asyncio
+import random
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Type, TypeVar
+
+from langchain.callbacks.manager import (AsyncCallbackManagerForLLMRun,
+                                         CallbackManagerForLLMRun)
+from langchain.chat_models.base import BaseChatModel
+from langchain.llms.base import LLM
+from langchain.schema import ChatGeneration, ChatResult
+from langchain.schema.messages import AIMessage, BaseMessage, get_buffer_string
+
+WORDS = (
+    "the good life reason virtue will being truth freedom duty nature "
+    "happiness knowledge soul justice power society history mind"
+).split()
+
+
+DEFAULT_TTFT = 0.2
+DEFAULT_TPS = 50.0
+DEFAULT_TOKENS = 200
+DEFAULT_SEED = 0
+
+FakeModel = TypeVar("FakeModel", bound="FakeStreamingMixin")
+
+
+class FakeStreamingMixin:
+    time_to_first_token: float
+    tokens_per_second: float
+    answer_tokens: int
+    seed: int
+
+    @classmethod
+    def from_version(cls: Type[FakeModel], model_version: Optional[str]) -> FakeModel:
+        settings = dict(item.split("=", 1) for item in (model_version or "").split(";") if item)
+        fields: Dict[str, Any] = {
+            "time_to_first_token": float(settings.get("ttft", DEFAULT_TTFT)),
+            "tokens_per_second": float(settings.get("tps", DEFAULT_TPS)),
+            "answer_tokens": int(settings.get("tokens", DEFAULT_TOKENS)),
+            "seed": int(settings.get("seed", DEFAULT_SEED)),
+        }
+        return cls(**fields)
+
+    def tokens(self, prompt: str) -> Iterator[str]:
+        rng = random.Random(self.seed ^ zlib.crc32(prompt.encode()))
+        for index in range(self.answer_tokens):
+            yield (" " if index else "") + rng.choice(WORDS)
+
+    def delays(self) -> Iterator[float]:
+        yield self.time_to_first_token
+        while True:
+            yield 1 / self.tokens_per_second
+
+    def stream_text(self, prompt: str, run_manager) -> str:
+        text = ""
+        for token, delay in zip(self.tokens(prompt), self.delays()):
+            time.sleep(delay)
+            text += token
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+        return text
+
+    async def astream_text(self, prompt: str, run_manager) -> str:
+        text = ""
+        for token, delay in zip(self.tokens(prompt), self.delays()):
+            await asyncio.sleep(delay)
+            text += token
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+        return text
+
+
+class FakeStreamingChatModel(FakeStreamingMixin, BaseChatModel):
+    time_to_first_token: float = DEFAULT_TTFT
+    tokens_per_second: float = DEFAULT_TPS
+    answer_tokens: int = DEFAULT_TOKENS
+    seed: int = DEFAULT_SEED
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self.stream_text(get_buffer_string(messages), run_manager)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = await self.astream_text(get_buffer_string(messages), run_manager)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class FakeStreamingLLM(FakeStreamingMixin, LLM):
+    time_to_first_token: float = DEFAULT_TTFT
+    tokens_per_second: float = DEFAULT_TPS
+    answer_tokens: int = DEFAULT_TOKENS
+    seed: int = DEFAULT_SEED
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-llm"
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return self.stream_text(prompt, run_manager)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return await self.astream_text(prompt, run_manager)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+from typing import Callable, Iterator, List, Optional
+
+from langchain.schema import BaseChatMessageHistory
+from langchain.schema.messages import AIMessage, BaseMessage, HumanMessage
+
+import utils.type_as as t
+
+
+# role is "human", "ai" or, in multi mode and batch answers, the answering philosopher's
+# name; to_message maps every role but "human" to an AIMessage.
+class ChatMessage:
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: t.SpeakerTypeAs, content: str):
+        self.role = role
+        self.content = content
+
+    def to_message(self) -> BaseMessage:
+        if self.role == "human":
+            return HumanMessage(content=self.content)
+        return AIMessage(content=self.content)
+
+
+def chain_digest(digest: str, role: t.SpeakerTypeAs, content: str) -> str:
+    payload = json.dumps([digest, role, content], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ChatHistory(BaseChatMessageHistory):
+    def __init__(
+        self,
+        offset: int = 0,
+        base: int = 0,
+        digest: str = "",
+        loader: Optional[Callable[[int, int], List[ChatMessage]]] = None,
+    ):
+        self.records: List[ChatMessage] = []
+        self.offset = offset
+        self.base = base
+        self.digest = digest
+        self.loader = loader
+        self.persisted = base
+
+    @property
+    def total(self) -> int:
+        return self.base + len(self.records)
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.to_messages()
+
+    @messages.setter
+    def messages(self, messages: List[BaseMessage]) -> None:
+        self.clear()
+        for message in messages:
+            self.add_message(message)
+
+    def slice(self, start: int = 0, stop: Optional[int] = None) -> List[ChatMessage]:
+        stop = self.total if stop is None else min(stop, self.total)
+        resident = self.records[max(start - self.base, 0) : max(stop - self.base, 0)]
+        if start >= self.base or self.loader is None:
+            return resident
+        return self.loader(start, min(stop, self.base)) + resident
+
+    def to_messages(self, start: int = 0, stop: Optional[int] = None) -> List[BaseMessage]:
+        return [record.to_message() for record in self.slice(start, stop)]
+
+    def append(self, role: t.SpeakerTypeAs, content: str) -> None:
+        self.records.append(ChatMessage(role, content))
+        self.digest = chain_digest(self.digest, role, content)
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.append("human" if isinstance(message, HumanMessage) else "ai", message.content)
+
+    def clear(self) -> None:
+        self.records = []
+        self.base = self.persisted = 0
+        self.digest = ""
+
+    def page_in(self, start: int) -> None:
+        if start < self.base and self.loader is not None:
+            self.records = self.loader(start, self.base) + self.records
+            self.base = start
+
+    def page_out(self, start: int) -> None:
+        start = min(start, self.persisted)
+        if start > self.base and self.loader is not None:
+            del self.records[: start - self.base]
+            self.base = start
+
+    def tail(self, n: int) -> List[ChatMessage]:
+        start = max(self.offset, self.total - n)
+        self.page_in(start)
+        return self.records[max(start - self.base, 0) :]
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        yield from self.slice(self.offset)
+
+    def __len__(self) -> int:
+        return max(0, self.total - self.offset)
@@ -1,12 +1,54 @@
-import requests
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
 
+from chat_o_sophy.cache import LRUCache
+from chat_o_sophy.config import load_yaml
+from utils.http import get_session
+from utils.logging import bind_context, configure_logger
 
-def lakera_guard(prompt: str, api_key):
-    response = requests.post(
+logger = configure_logger(__file__)
+
+GUARD_CONFIG = load_yaml("config/guard.yaml")
+
+GUARD_CACHE: LRUCache[Tuple[bool, dict]] = LRUCache(**GUARD_CONFIG["cache"])
+GUARD_EXECUTOR = ThreadPoolExecutor(
+    max_workers=GUARD_CONFIG["max_workers"], thread_name_prefix="lakera_guard"
+)
+
+
+class GuardFlaggedError(Exception):
+    def __init__(self, response):
+        super().__init__("Lakera Guard flagged the prompt")
+        self.response = response
+
+
+def lakera_guard(prompt: str, api_key) -> Tuple[bool, dict]:
+    key = hashlib.sha256(prompt.encode()).hexdigest()
+    if (verdict := GUARD_CACHE.get(key)) is not None:
+        logger.info("Lakera Guard verdict", extra={"flagged": verdict[0], "cached": True})
+        return verdict
+
+    response = get_session().post(
         "https://api.lakera.ai/v1/prompt_injection",
         json={"input": prompt},
         headers={"Authorization": f"Bearer {api_key}"},
     ).json()
 
     flagged = response["results"][0]["flagged"]
+    GUARD_CACHE.set(key, (flagged, response))
+    logger.info("Lakera Guard verdict", extra={"flagged": flagged, "cached": False})
     return flagged, response
+
+
+class SpeculativeGuard:
+    def __init__(self, prompt: str, api_key):
+        self.future = GUARD_EXECUTOR.submit(bind_context(lakera_guard, prompt, api_key))
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def check(self) -> None:
+        flagged, response = self.future.result()
+        if flagged:
+            raise GuardFlaggedError(response)
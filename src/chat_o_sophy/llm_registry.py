@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from langchain.schema.language_model import BaseLanguageModel
+
+import utils.type_as as t
+from chat_o_sophy.config import CONFIG
+from utils.http import create_shared_session
+from utils.logging import configure_logger
+
+logger = configure_logger(__file__)
+
+IDLE_TTL = 600
+
+
+def fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class LLMRegistry:
+    def __init__(self, idle_ttl: float = IDLE_TTL):
+        self.idle_ttl = idle_ttl
+        self.clients: Dict[Tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def get(
+        self,
+        model_provider: t.ProviderTypeAs,
+        model_name: t.ModelNameTypeAs,
+        model_owner: t.ModelOwnerTypeAs = None,
+        model_version: t.ModelVersionTypeAs = None,
+    ) -> BaseLanguageModel:
+        provider = CONFIG.providers.get(model_provider)
+        api_key = os.environ.get(provider.env_var, "") if provider else ""
+        key = (model_provider, model_name, model_version, fingerprint(api_key))
+        now = time.monotonic()
+        with self.lock:
+            self.evict_idle(now)
+            if (entry := self.clients.get(key)) is None:
+                llm = self.create(
+                    model_provider, model_name, model_owner, model_version, api_key
+                )
+                entry = self.clients[key] = [llm, now]
+                logger.info(f"Created LLM client for {model_provider}/{model_name}")
+            entry[1] = now
+            return entry[0]
+
+    def evict_idle(self, now: float) -> None:
+        for key in [
+            key
+            for key, (_, last_used) in self.clients.items()
+            if now - last_used > self.idle_ttl
+        ]:
+            del self.clients[key]
+
+    @staticmethod
+    def create(
+        model_provider, model_name, model_owner, model_version, api_key
+    ) -> BaseLanguageModel:
+        if model_provider == "openai":
+            import openai
+            from langchain.chat_models import ChatOpenAI
+
+            openai.requestssession = create_shared_session
+            return ChatOpenAI(
+                model=model_name,
+                streaming=True,
+                openai_api_key=api_key,
+            )
+        elif model_provider == "replicate":
+            from langchain.llms import Replicate
+
+            return Replicate(
+                model=f"{model_owner}/{model_name}:{model_version}",
+                streaming=True,
+                model_kwargs={"max_length": 8192},
+                replicate_api_token=api_key,
+            )
+        elif model_provider == "fake":
+            from chat_o_sophy.fake_llm import (FakeStreamingChatModel,
+                                               FakeStreamingLLM)
+
+            if model_name == "fake-llm":
+                return FakeStreamingLLM.from_version(model_version)
+            return FakeStreamingChatModel.from_version(model_version)
+        raise ValueError(f"Unknown model provider: {model_provider}")
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+
+LLM_REGISTRY = LLMRegistry()
@@ -0,0 +1,68 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.memory import ConversationBufferMemory
+from langchain.schema.messages import (BaseMessage, SystemMessage,
+                                       get_buffer_string)
+
+from chat_o_sophy.history import ChatHistory, ChatMessage
+from utils.tokens import count_tokens
+
+
+class TokenWindowMemory(ConversationBufferMemory):
+    chat_memory: ChatHistory
+    max_tokens: int = 2000
+    pinned_messages: int = 2
+    summarizer: Optional[Callable[[str], str]] = None
+    summary_prompt: str = ""
+    summary: str = ""
+    window_start: int = 0
+
+    @property
+    def summary_message(self) -> List[BaseMessage]:
+        if not self.summary:
+            return []
+        return [SystemMessage(content=f"<Summary of the earlier conversation: {self.summary}>")]
+
+    @property
+    def buffer_as_messages(self) -> List[BaseMessage]:
+        pinned = self.chat_memory.to_messages(stop=self.pinned_messages)
+        window = self.chat_memory.to_messages(start=self.pinned_messages + self.window_start)
+        return pinned + self.summary_message + window
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {self.memory_key: self.buffer_as_messages}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        self.prune()
+
+    def evictable(self) -> List[ChatMessage]:
+        pinned = self.chat_memory.slice(stop=self.pinned_messages)
+        turns = self.chat_memory.slice(start=self.pinned_messages + self.window_start)
+
+        budget = self.max_tokens - sum(count_tokens(record.content) for record in pinned)
+        budget -= sum(count_tokens(message.content) for message in self.summary_message)
+        keep_from = len(turns)
+        while keep_from > 0:
+            start = max(keep_from - 2, 0)
+            budget -= sum(count_tokens(record.content) for record in turns[start:keep_from])
+            if budget < 0 and keep_from < len(turns):
+                break
+            keep_from = start
+        return turns[:keep_from]
+
+    def prune(self) -> None:
+        if self.summarizer is None:
+            self.window_start += len(self.evictable())
+
+    def summarize(self) -> bool:
+        if self.summarizer is None or not (evicted := self.evictable()):
+            return False
+        summary = self.summarizer(
+            self.summary_prompt.format(
+                summary=self.summary,
+                new_lines=get_buffer_string([record.to_message() for record in evicted]),
+            )
+        )
+        self.summary, self.window_start = summary, self.window_start + len(evicted)
+        return True
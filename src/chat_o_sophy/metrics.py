@@ -0,0 +1,185 @@
+import atexit
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import LLMResult
+
+from chat_o_sophy.config import ROOT_DIR, load_yaml
+from utils.logging import TRACE_ID, configure_logger
+from utils.tokens import count_tokens
+
+logger = configure_logger(__file__)
+
+METRICS_CONFIG = load_yaml("config/metrics.yaml")
+
+LABELS = ("provider", "model", "philosopher", "mode")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, labels: Tuple) -> None:
+        series = self.series.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+
+class MetricsRegistry:
+    def __init__(self, config: dict):
+        self.histograms = {
+            name: Histogram(buckets) for name, buckets in config["buckets"].items()
+        }
+        self.records: Deque[dict] = deque(maxlen=config["max_records"])
+        self.jsonl_path: Optional[Path] = None
+        self.prometheus_path: Optional[Path] = None
+        if config["jsonl_path"]:
+            self.jsonl_path = ROOT_DIR / config["jsonl_path"]
+        if config["prometheus_path"]:
+            self.prometheus_path = ROOT_DIR / config["prometheus_path"]
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flush_interval = config["flush_interval_seconds"]
+        self.pending: list = []
+        if self.jsonl_path or self.prometheus_path:
+            threading.Thread(target=self.flush_loop, name="metrics_flush", daemon=True).start()
+            atexit.register(self.flush)
+
+    def record(self, record: dict) -> None:
+        labels = tuple(str(record[label]) for label in LABELS)
+        with self.lock:
+            for name, histogram in self.histograms.items():
+                if record.get(name) is not None:
+                    histogram.observe(record[name], labels)
+            self.records.append(record)
+            if self.jsonl_path or self.prometheus_path:
+                self.pending.append(record)
+
+    def flush(self) -> None:
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, []
+                if not pending:
+                    return
+                prometheus = self._export_prometheus() if self.prometheus_path else ""
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a") as f:
+                    f.writelines(json.dumps(record) + "\n" for record in pending)
+            if self.prometheus_path:
+                self.prometheus_path.write_text(prometheus)
+
+    def flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to write metrics")
+
+    def export_prometheus(self) -> str:
+        with self.lock:
+            return self._export_prometheus()
+
+    def _export_prometheus(self) -> str:
+        lines = []
+        for name, histogram in self.histograms.items():
+            metric = f"chat_o_sophy_llm_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, (counts, total, count) in histogram.series.items():
+                label_str = ",".join(
+                    f'{key}="{value}"' for key, value in zip(LABELS, labels)
+                )
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{metric}_bucket{{{label_str},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'{metric}_bucket{{{label_str},le="+Inf"}} {count}')
+                lines.append(f"{metric}_sum{{{label_str}}} {total}")
+                lines.append(f"{metric}_count{{{label_str}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> List[dict]:
+        with self.lock:
+            rows: Dict[Tuple, dict] = {}
+            for name, histogram in self.histograms.items():
+                for labels, (_, total, count) in histogram.series.items():
+                    row = rows.setdefault(labels, dict(zip(LABELS, labels)))
+                    row[f"mean_{name}"] = round(total / count, 3)
+                    row["count"] = max(row.get("count", 0), count)
+        return list(rows.values())
+
+    def export_jsonl(self) -> str:
+        with self.lock:
+            return "".join(json.dumps(record) + "\n" for record in self.records)
+
+
+METRICS = MetricsRegistry(METRICS_CONFIG)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    run_inline = True
+
+    def __init__(self, labels: dict, registry: MetricsRegistry = METRICS):
+        self.labels = labels
+        self.registry = registry
+
+    def start(self, prompt_tokens: int) -> None:
+        self.start_time = time.perf_counter()
+        self.first_token_time: Optional[float] = None
+        self.prompt_tokens = prompt_tokens
+        self.streamed_tokens = 0
+
+    def on_llm_start(self, serialized, prompts, *args, **kwargs):
+        self.start(sum(count_tokens(prompt) for prompt in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *args, **kwargs):
+        self.start(
+            sum(count_tokens(message.content) for batch in messages for message in batch)
+        )
+
+    def on_llm_new_token(self, token: str, *args, **kwargs):
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+        self.streamed_tokens += 1
+
+    def on_llm_end(self, response: LLMResult, *args, **kwargs):
+        end_time = time.perf_counter()
+        token_usage = (response.llm_output or {}).get("token_usage", {})
+        completion_tokens = token_usage.get("completion_tokens") or (
+            self.streamed_tokens
+            or count_tokens(response.generations[0][0].text)
+        )
+        prompt_tokens = token_usage.get("prompt_tokens") or self.prompt_tokens
+
+        time_to_first_token = None
+        generation_time = end_time - self.start_time
+        if self.first_token_time is not None:
+            time_to_first_token = self.first_token_time - self.start_time
+            generation_time = end_time - self.first_token_time
+
+        self.registry.record(
+            {
+                **self.labels,
+                "trace_id": TRACE_ID.get(),
+                "timestamp": time.time(),
+                "time_to_first_token_seconds": time_to_first_token,
+                "latency_seconds": end_time - self.start_time,
+                "tokens_per_second": completion_tokens / generation_time
+                if generation_time > 0
+                else None,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            }
+        )
@@ -1,33 +1,63 @@
 import streamlit as st
-import yaml
 
-from chat_o_sophy.chatbot import PhilosopherChatbot
-from chat_o_sophy.llm_guard import lakera_guard
+from chat_o_sophy.assets import ASSETS
+from chat_o_sophy.config import CONFIG
+from chat_o_sophy.llm_guard import (GUARD_CONFIG, GuardFlaggedError,
+                                    SpeculativeGuard, lakera_guard)
+from chat_o_sophy.prewarm import start_prewarm
+from chat_o_sophy.rendering import render_history, reset_history_window
+from chat_o_sophy.scheduler import SchedulerBusyError
+from chat_o_sophy.session import SESSIONS, ChatSession
 from chat_o_sophy.sidebar import Sidebar
-from utils.logging import configure_logger
+from chat_o_sophy.store import CONVERSATION_STORE
+from utils.logging import configure_logger, trace
 
 logger = configure_logger(__file__)
 
 st.set_page_config(page_title="chat-o-sophy - multi mode", page_icon="💭")
 
-with open("data/philosophers.yaml") as f:
-    PHILOSOPHERS = yaml.safe_load(f)
 
+def display_chat_history(chat_session, avatar):
+    render_history(chat_session.history, avatar)
 
-def display_chat_history(chatbot, avatar):
-    for message in chatbot.history:
-        role, content = message["role"], message["content"]
-        st.chat_message(role, avatar=avatar if role == "ai" else None).markdown(content)
 
+def display_guard_error(lakera_response):
+    st.error("Lakera Guard detected a potentially harmful prompt", icon="🛡️")
+    st.expander("Lakera Guard API — LOGS").write(lakera_response)
 
-def initialize_chatbot(model_name, model_provider, model_owner, model_version):
-    st.session_state.chatbot = PhilosopherChatbot(
-        philosopher=st.session_state.current_choice,
-        model_provider=model_provider,
-        model_name=model_name,
-        model_owner=model_owner,
-        model_version=model_version,
+
+def display_busy_error():
+    st.warning("The model is busy, please try again in a moment", icon="⏳")
+
+
+def initialize_chatbot(
+    model_name, model_provider, model_owner, model_version, language
+):
+    reset_history_window()
+    st.session_state.chat_session = SESSIONS.register(
+        ChatSession(
+            philosopher=st.session_state.current_choice,
+            language=language,
+            model_provider=model_provider,
+            model_name=model_name,
+            model_owner=model_owner,
+            model_version=model_version,
+        )
     )
+    if CONVERSATION_STORE is not None:
+        st.experimental_set_query_params(
+            conversation=st.session_state.chat_session.conversation_id
+        )
+
+
+def resume_chatbot():
+    if "chat_session" in st.session_state:
+        return
+    conversation_id = st.experimental_get_query_params().get("conversation", [None])[0]
+    if conversation_id and (chat_session := ChatSession.resume(conversation_id)):
+        reset_history_window()
+        st.session_state.chat_session = SESSIONS.register(chat_session)
+        st.session_state.current_choice = chat_session.philosopher
 
 
 def main():
@@ -36,6 +66,8 @@ def main():
 
     sidebar = st.session_state.setdefault("sidebar", Sidebar())
     sidebar.main()
+    start_prewarm()
+    resume_chatbot()
 
     authentificated = sidebar.model_api_manager.authentificated
     model_provider = sidebar.model_api_manager.model_provider
@@ -48,7 +80,7 @@ def main():
     current_choice = st.selectbox(
         label="Philosopher:",
         placeholder="Choose one philosopher",
-        options=PHILOSOPHERS.keys(),
+        options=CONFIG.philosophers.keys(),
         index=None,
         key="current_choice",
         disabled=not authentificated,
@@ -58,6 +90,7 @@ def main():
             "model_provider": model_provider,
             "model_owner": model_owner,
             "model_version": model_version,
+            "language": selected_language,
         },
     )
 
@@ -68,35 +101,47 @@ def main():
         st.info("Select a philosopher in the above menu", icon="ℹ️")
         return
 
-    if chatbot := st.session_state.get("chatbot"):
-        avatar = f"assets/avatars/{PHILOSOPHERS[chatbot.philosopher]['avatar']}"
-        display_chat_history(chatbot, avatar)
+    if chat_session := st.session_state.get("chat_session"):
+        avatar = ASSETS.avatar(CONFIG.philosophers[chat_session.philosopher].avatar)
+        display_chat_history(chat_session, avatar)
 
-        if chatbot.history == []:
+        if not chat_session.history:
             with st.chat_message("ai", avatar=avatar):
                 with st.spinner(f"{current_choice} is writing..."):
-                    chatbot.greet(language=selected_language)
+                    chat_session.chatbot.greet(language=chat_session.language)
 
         if prompt := st.chat_input(
             placeholder="What do you want to know?",
             disabled=not (current_choice and authentificated),
         ):
-            st.chat_message("human").markdown(prompt)
-
-            # LAKERA GUARD
-            if lakera_guard_active:
-                lakera_flagged, lakera_response = lakera_guard(
-                    prompt=prompt, api_key=st.secrets.get("lakera_guard_api").key
-                )
-                if lakera_flagged:
-                    st.error("Lakera Guard detected a potentially harmful prompt", icon="🛡️")
-                    st.expander("Lakera Guard API — LOGS").write(lakera_response)
-                    return
-
-            # CHATBOT ANSWER
-            with st.chat_message("ai", avatar=avatar):
-                with st.spinner(f"{current_choice} is writing..."):
-                    chatbot.chat(prompt, language=selected_language)
+            with trace():
+                st.chat_message("human").markdown(prompt)
+
+                # LAKERA GUARD
+                guard = None
+                if lakera_guard_active:
+                    api_key = st.secrets.get("lakera_guard_api").key
+                    if GUARD_CONFIG["speculative"]:
+                        guard = SpeculativeGuard(prompt=prompt, api_key=api_key)
+                    else:
+                        lakera_flagged, lakera_response = lakera_guard(
+                            prompt=prompt, api_key=api_key
+                        )
+                        if lakera_flagged:
+                            display_guard_error(lakera_response)
+                            return
+
+                # CHATBOT ANSWER
+                try:
+                    with st.chat_message("ai", avatar=avatar):
+                        with st.spinner(f"{current_choice} is writing..."):
+                            chat_session.chatbot.chat(
+                                prompt, language=chat_session.language, guard=guard
+                            )
+                except GuardFlaggedError as error:
+                    display_guard_error(error.response)
+                except SchedulerBusyError:
+                    display_busy_error()
 
 
 if __name__ == "__main__":
@@ -1,17 +1,55 @@
 import streamlit as st
-import yaml
 
+from chat_o_sophy.assets import ASSETS
 from chat_o_sophy.chatbot import AssistantChatbot, PhilosopherChatbot
-from chat_o_sophy.llm_guard import lakera_guard
+from chat_o_sophy.concurrency import fan_out
+from chat_o_sophy.config import CONFIG
+from chat_o_sophy.history import ChatHistory
+from chat_o_sophy.llm_guard import (GUARD_CONFIG, GuardFlaggedError,
+                                    SpeculativeGuard, lakera_guard)
+from chat_o_sophy.scheduler import SchedulerBusyError
 from chat_o_sophy.sidebar import Sidebar
-from utils.logging import configure_logger
+from chat_o_sophy.similarity import QUESTION_INDEX
+from utils.logging import configure_logger, trace
 
 logger = configure_logger(__file__)
 
 st.set_page_config(page_title="chat-o-sophy - multi mode", page_icon="💭")
 
-with open("data/philosophers.yaml") as f:
-    PHILOSOPHERS = yaml.safe_load(f)
+
+def display_guard_error(lakera_response):
+    st.error("Lakera Guard detected a potentially harmful prompt", icon="🛡️")
+    st.expander("Lakera Guard API — LOGS").write(lakera_response)
+
+
+def display_busy_error():
+    st.warning("The model is busy, please try again in a moment", icon="⏳")
+
+
+def regenerate(prompt):
+    st.session_state.regenerate_prompt = prompt
+
+
+def display_similar_answers(prompt, stored, similarity, philosophers):
+    st.info(
+        f"Showing the answers to a similar question ({similarity:.0%} match): "
+        f"*{stored.question}*",
+        icon="♻️",
+    )
+    for philosopher in philosophers:
+        st.header(f"{philosopher}'s answer", divider="gray", anchor=False)
+        avatar = ASSETS.avatar(CONFIG.philosophers[philosopher].avatar)
+        st.chat_message("ai", avatar=avatar).markdown(stored.answers[philosopher])
+    if stored.synthesis_text or stored.synthesis_table:
+        st.header(
+            "Synthesis",
+            anchor=False,
+            help="Generated by an AI assistant, based on the above answers.",
+            divider="gray",
+        )
+        st.markdown(stored.synthesis_text or "")
+        st.markdown(stored.synthesis_table or "")
+    st.button("Generate fresh answers", on_click=regenerate, args=(prompt,))
 
 
 def initialize_chatbot(model_name, model_provider, model_owner, model_version):
@@ -43,7 +81,7 @@ def main():
     current_choices = st.multiselect(
         label="Philosophers:",
         placeholder="Choose several philosophers",
-        options=PHILOSOPHERS.keys(),
+        options=CONFIG.philosophers.keys(),
         max_selections=5,
         default=None,
         disabled=not authentificated,
@@ -55,56 +93,126 @@ def main():
     elif not current_choices:
         st.info("Select up to 5 philosophers in the above menu", icon="ℹ️")
 
+    regenerate_prompt = st.session_state.pop("regenerate_prompt", None)
     if prompt := st.chat_input(
         placeholder="What is your question?",
         disabled=not (current_choices and authentificated),
-    ):
-        st.chat_message("human").markdown(prompt)
-
-        # LAKERA GUARD
-        if lakera_guard_active:
-            lakera_flagged, lakera_response = lakera_guard(
-                prompt=prompt, api_key=st.secrets.get("lakera_guard_api").key
+    ) or regenerate_prompt:
+        with trace():
+            st.chat_message("human").markdown(prompt)
+
+            # LAKERA GUARD
+            guard = None
+            if lakera_guard_active:
+                api_key = st.secrets.get("lakera_guard_api").key
+                if GUARD_CONFIG["speculative"]:
+                    guard = SpeculativeGuard(prompt=prompt, api_key=api_key)
+                else:
+                    lakera_flagged, lakera_response = lakera_guard(
+                        prompt=prompt, api_key=api_key
+                    )
+                    if lakera_flagged:
+                        display_guard_error(lakera_response)
+                        return
+
+            # SIMILAR QUESTION
+            scope = QUESTION_INDEX.scope(
+                current_choices, selected_language, model_provider, chosen_model, model_version
             )
-            if lakera_flagged:
-                st.error("Lakera Guard detected a potentially harmful prompt", icon="🛡️")
-                st.expander("Lakera Guard API — LOGS").write(lakera_response)
+            if prompt != regenerate_prompt and (
+                match := QUESTION_INDEX.lookup(prompt, scope)
+            ):
+                if guard is not None:
+                    try:
+                        guard.check()
+                    except GuardFlaggedError as error:
+                        display_guard_error(error.response)
+                        return
+                display_similar_answers(prompt, *match, current_choices)
                 return
 
-        # CHATBOTS ANSWERS
-        history = [{"role": "human", "content": prompt}]
-        for philosopher in current_choices:
-            st.header(f"{philosopher}'s answer", divider="gray", anchor=False)
-            chatbot = PhilosopherChatbot(
-                philosopher=philosopher,
+            # CHATBOTS ANSWERS
+            history = ChatHistory()
+            history.append("human", prompt)
+            chatbots, containers = [], []
+            for philosopher in current_choices:
+                st.header(f"{philosopher}'s answer", divider="gray", anchor=False)
+                chatbot = PhilosopherChatbot(
+                    philosopher=philosopher,
+                    model_provider=model_provider,
+                    model_name=chosen_model,
+                    model_owner=model_owner,
+                    model_version=model_version,
+                    mode="multi",
+                )
+                avatar = ASSETS.avatar(CONFIG.philosophers[chatbot.philosopher].avatar)
+                with st.chat_message("ai", avatar=avatar):
+                    container = st.empty()
+                    container.caption(f"{chatbot.philosopher} is writing...")
+                chatbots.append(chatbot)
+                containers.append(container)
+
+            try:
+                answers = fan_out(
+                    chatbots=chatbots,
+                    containers=containers,
+                    prompt=prompt,
+                    language=selected_language,
+                    max_concurrency=len(chatbots),
+                    guard=guard,
+                    use_cache=prompt != regenerate_prompt,
+                )
+            except GuardFlaggedError as error:
+                for container in containers:
+                    container.empty()
+                display_guard_error(error.response)
+                return
+            except SchedulerBusyError:
+                for container in containers:
+                    container.empty()
+                display_busy_error()
+                return
+            for philosopher, answer in zip(current_choices, answers):
+                history.append(philosopher, answer)
+
+            st.header(
+                "Synthesis",
+                anchor=False,
+                help="Generated by an AI assistant, based on the above answers.",
+                divider="gray",
+            )
+            assistant = AssistantChatbot(
+                history=history,
                 model_provider=model_provider,
                 model_name=chosen_model,
                 model_owner=model_owner,
                 model_version=model_version,
             )
-            avatar = f"assets/avatars/{PHILOSOPHERS[chatbot.philosopher]['avatar']}"
-            with st.chat_message("ai", avatar=avatar):
-                with st.spinner(f"{chatbot.philosopher} is writing..."):
-                    answer = chatbot.chat(prompt=prompt, language=selected_language)
-                    history.append({"role": philosopher, "content": answer})
-
-        st.header(
-            "Synthesis",
-            anchor=False,
-            help="Generated by an AI assistant, based on the above answers.",
-            divider="gray",
-        )
-        assistant = AssistantChatbot(
-            history=history,
-            model_provider=model_provider,
-            model_name=chosen_model,
-            model_owner=model_owner,
-            model_version=model_version,
-        )
-        with st.spinner("Assistant is summarizing the reponses..."):
-            assistant.summary_text(language=selected_language)
-        with st.spinner("Assistant is generating a summary table..."):
-            assistant.summary_table(language=selected_language)
+            try:
+                if assistant.synthesis_mode == "single_pass":
+                    containers = (st.empty(), st.empty())
+                    with st.spinner("Assistant is summarizing the reponses..."):
+                        text, table = assistant.summary(
+                            language=selected_language, containers=containers
+                        )
+                    if not table:
+                        with st.spinner("Assistant is generating a summary table..."):
+                            table = assistant.summary_table(language=selected_language)
+                else:
+                    with st.spinner("Assistant is summarizing the reponses..."):
+                        text = assistant.summary_text(language=selected_language)
+                    with st.spinner("Assistant is generating a summary table..."):
+                        table = assistant.summary_table(language=selected_language)
+            except SchedulerBusyError:
+                display_busy_error()
+                return
+            QUESTION_INDEX.add(
+                prompt,
+                scope,
+                answers=dict(zip(current_choices, answers)),
+                synthesis_text=text,
+                synthesis_table=table,
+            )
 
 
 if __name__ == "__main__":
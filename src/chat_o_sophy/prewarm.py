@@ -0,0 +1,121 @@
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import streamlit as st
+
+from chat_o_sophy.cache import CACHE_CONFIG, RESPONSE_CACHE
+from chat_o_sophy.concurrency import RateLimiter
+from chat_o_sophy.config import CONFIG
+from chat_o_sophy.sidebar.language_manager import LANGUAGES
+from utils.logging import configure_logger
+
+logger = configure_logger(__file__)
+
+
+def available_models():
+    return [
+        model_name
+        for model_name, model in CONFIG.models.items()
+        if os.environ.get(CONFIG.providers[model.model_provider].env_var)
+    ]
+
+
+def greeting_grid(models):
+    return [
+        (philosopher, language, model_name)
+        for model_name in models
+        for philosopher in CONFIG.philosophers
+        for language in LANGUAGES
+    ]
+
+
+def prewarm_greeting(philosopher, language, model_name, rate_limiter):
+    from chat_o_sophy.chatbot import PhilosopherChatbot
+
+    model = CONFIG.models[model_name]
+    chatbot = PhilosopherChatbot(
+        philosopher=philosopher,
+        model_provider=model.model_provider,
+        model_name=model_name,
+        model_owner=model.model_owner,
+        model_version=model.model_version,
+        mode="prewarm",
+    )
+    if chatbot.cache_key(chatbot.greetings_prompt, language) in RESPONSE_CACHE:
+        return False
+    rate_limiter.wait()
+    return chatbot.prewarm_greeting(language=language)
+
+
+def prewarm(models=None):
+    models = available_models() if models is None else models
+    grid_by_provider = {}
+    for philosopher, language, model_name in greeting_grid(models):
+        model_provider = CONFIG.models[model_name].model_provider
+        grid_by_provider.setdefault(model_provider, []).append(
+            (philosopher, language, model_name)
+        )
+
+    executors, futures = [], []
+    for model_provider, grid in grid_by_provider.items():
+        provider = CONFIG.providers[model_provider]
+        rate_limiter = RateLimiter(provider.requests_per_minute)
+        executor = ThreadPoolExecutor(
+            max_workers=provider.max_concurrency,
+            thread_name_prefix=f"prewarm_{model_provider}",
+        )
+        executors.append(executor)
+        futures.extend(
+            executor.submit(prewarm_greeting, *greeting, rate_limiter)
+            for greeting in grid
+        )
+
+    generated = failed = 0
+    for future in as_completed(futures):
+        try:
+            generated += future.result()
+        except Exception:
+            failed += 1
+            logger.exception("Greeting pre-warm failed")
+    for executor in executors:
+        executor.shutdown()
+
+    logger.info(
+        f"Greeting pre-warm done: {generated} generated, "
+        f"{len(futures) - generated - failed} already cached, {failed} failed"
+    )
+    return generated
+
+
+@st.cache_resource(show_spinner=False)
+def start_prewarm():
+    if not CACHE_CONFIG["prewarm"]["on_startup"]:
+        return None
+    thread = threading.Thread(target=prewarm, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-generate philosopher greetings into the response cache"
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=list(CONFIG.models.keys()),
+        help="Models to pre-warm (default: every model with an API key set)",
+    )
+    args = parser.parse_args()
+
+    if not CACHE_CONFIG["sqlite"]["enabled"]:
+        logger.warning(
+            "SQLite cache tier is disabled, pre-warmed greetings will not outlive this process"
+        )
+    prewarm(models=args.models)
+
+
+if __name__ == "__main__":
+    main()
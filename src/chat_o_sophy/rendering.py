@@ -0,0 +1,30 @@
+import streamlit as st
+
+from chat_o_sophy.callbacks import STREAMING_CONFIG
+from chat_o_sophy.history import ChatHistory
+
+SHOWN_KEY = "rendering.history_shown"
+
+
+def reset_history_window():
+    st.session_state[SHOWN_KEY] = STREAMING_CONFIG["history_window"]
+
+
+def show_earlier_messages():
+    st.session_state[SHOWN_KEY] += STREAMING_CONFIG["history_page"]
+
+
+def render_history(history: ChatHistory, avatar) -> int:
+    shown = st.session_state.setdefault(SHOWN_KEY, STREAMING_CONFIG["history_window"])
+    hidden = len(history) - shown
+    if hidden > 0:
+        st.button(
+            label=f"Show earlier messages ({hidden} hidden)",
+            on_click=show_earlier_messages,
+            use_container_width=True,
+        )
+    messages = history.tail(shown)
+    for message in messages:
+        role, content = message.role, message.content
+        st.chat_message(role, avatar=avatar if role == "ai" else None).markdown(content)
+    return len(messages)
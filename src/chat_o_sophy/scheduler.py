@@ -0,0 +1,257 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from typing import Callable, Deque, Dict, Optional
+
+from chat_o_sophy.config import CONFIG, load_yaml
+from utils.logging import configure_logger
+from utils.tokens import count_tokens
+
+logger = configure_logger(__file__)
+
+SCHEDULER_CONFIG = load_yaml("config/scheduler.yaml")
+
+PREWARM_SESSION_ID = "prewarm"
+
+
+class SchedulerBusyError(Exception):
+    def __init__(self, provider: str):
+        super().__init__(f"Too many queued requests for {provider}")
+        self.provider = provider
+
+
+def current_session_id() -> str:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else PREWARM_SESSION_ID
+
+
+def estimate_tokens(inputs: dict) -> int:
+    tokens = 0
+    for value in inputs.values():
+        if isinstance(value, str):
+            tokens += count_tokens(value)
+        elif isinstance(value, list):
+            tokens += sum(count_tokens(message.content) for message in value)
+    return tokens
+
+
+def notify_position(handlers: list, position: int) -> None:
+    for handler in handlers:
+        if (callback := getattr(handler, "on_queue_position", None)) is not None:
+            callback(position)
+
+
+class Ticket:
+    __slots__ = ("session_id", "tokens", "granted", "waker")
+
+    def __init__(self, session_id: str, tokens: float):
+        self.session_id = session_id
+        self.tokens = tokens
+        self.granted = False
+        self.waker: Optional[Callable[[], object]] = None
+
+
+class ProviderQueue:
+    def __init__(self, name: str, max_concurrency: int, tokens_per_minute: float, max_queue: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.condition = threading.Condition()
+        self.running = 0
+        self.waiting: Dict[str, Deque[Ticket]] = {}
+        self.order: Deque[str] = deque()
+        self.budget = tokens_per_minute
+        self.refilled_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return sum(len(tickets) for tickets in self.waiting.values())
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.budget = min(
+            self.tokens_per_minute,
+            self.budget + (now - self.refilled_at) * self.tokens_per_minute / 60,
+        )
+        self.refilled_at = now
+
+    def head(self) -> Optional[Ticket]:
+        return self.waiting[self.order[0]][0] if self.order else None
+
+    def dispatch(self) -> None:
+        self.refill()
+        while (ticket := self.head()) and self.running < self.max_concurrency:
+            if ticket.tokens > self.budget:
+                break
+            self.order.popleft()
+            tickets = self.waiting[ticket.session_id]
+            tickets.popleft()
+            if tickets:
+                self.order.append(ticket.session_id)
+            else:
+                del self.waiting[ticket.session_id]
+            self.budget -= ticket.tokens
+            self.running += 1
+            ticket.granted = True
+            if ticket.waker is not None:
+                ticket.waker()
+        self.condition.notify_all()
+        for tickets in self.waiting.values():
+            for ticket in tickets:
+                if ticket.waker is not None:
+                    ticket.waker()
+
+    def retry_after(self) -> Optional[float]:
+        ticket = self.head()
+        if ticket is None or self.running >= self.max_concurrency:
+            return None
+        deficit = ticket.tokens - self.budget
+        return max(0.01, deficit * 60 / self.tokens_per_minute) if deficit > 0 else None
+
+    def position(self, ticket: Ticket) -> int:
+        if ticket.granted:
+            return 0
+        index = self.waiting[ticket.session_id].index(ticket)
+        rank = self.order.index(ticket.session_id)
+        return 1 + sum(
+            min(len(self.waiting[session_id]), index + (i < rank))
+            for i, session_id in enumerate(self.order)
+        )
+
+    def enqueue(self, ticket: Ticket) -> Ticket:
+        ticket.tokens = min(ticket.tokens, self.tokens_per_minute)
+        session_id = ticket.session_id
+        with self.condition:
+            if len(self) >= self.max_queue:
+                raise SchedulerBusyError(self.name)
+            if session_id not in self.waiting:
+                self.waiting[session_id] = deque()
+                self.order.append(session_id)
+            self.waiting[session_id].append(ticket)
+            self.dispatch()
+        return ticket
+
+    def cancel(self, ticket: Ticket) -> None:
+        with self.condition:
+            if ticket.granted:
+                self.running -= 1
+            else:
+                tickets = self.waiting[ticket.session_id]
+                tickets.remove(ticket)
+                if not tickets:
+                    del self.waiting[ticket.session_id]
+                    self.order.remove(ticket.session_id)
+            self.dispatch()
+
+    def acquire(
+        self, session_id: str, tokens: int, on_position: Optional[Callable[[int], None]] = None
+    ) -> Ticket:
+        ticket = self.enqueue(Ticket(session_id, tokens))
+        reported = 0
+        try:
+            while True:
+                with self.condition:
+                    position = self.position(ticket)
+                if position != reported and on_position is not None:
+                    on_position(position)
+                reported = position
+                if not position:
+                    return ticket
+                with self.condition:
+                    if not ticket.granted:
+                        self.condition.wait(timeout=self.retry_after())
+                        self.dispatch()
+        except BaseException:
+            self.cancel(ticket)
+            raise
+
+    async def aacquire(
+        self, session_id: str, tokens: int, on_position: Optional[Callable[[int], None]] = None
+    ) -> Ticket:
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        ticket = Ticket(session_id, tokens)
+        ticket.waker = partial(loop.call_soon_threadsafe, changed.set)
+        ticket = self.enqueue(ticket)
+        reported = 0
+        try:
+            while True:
+                changed.clear()
+                with self.condition:
+                    position = self.position(ticket)
+                    retry_after = self.retry_after()
+                if position != reported and on_position is not None:
+                    on_position(position)
+                reported = position
+                if not position:
+                    return ticket
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=retry_after)
+                except asyncio.TimeoutError:
+                    with self.condition:
+                        self.dispatch()
+        except BaseException:
+            self.cancel(ticket)
+            raise
+
+    def release(self, ticket: Ticket) -> None:
+        with self.condition:
+            self.running -= 1
+            self.dispatch()
+
+
+class Scheduler:
+    def __init__(self, max_queue: int, completion_tokens: int):
+        self.max_queue = max_queue
+        self.completion_tokens = completion_tokens
+        self.queues: Dict[str, ProviderQueue] = {}
+        self.lock = threading.Lock()
+
+    def queue(self, model_provider: str) -> Optional[ProviderQueue]:
+        if (provider := CONFIG.providers.get(model_provider)) is None:
+            return None
+        with self.lock:
+            if (queue := self.queues.get(model_provider)) is None:
+                queue = self.queues[model_provider] = ProviderQueue(
+                    name=model_provider,
+                    max_concurrency=provider.max_concurrency,
+                    tokens_per_minute=provider.tokens_per_minute,
+                    max_queue=self.max_queue,
+                )
+            return queue
+
+    @contextmanager
+    def slot(self, model_provider: str, session_id: str, inputs: dict, handlers: list):
+        if (queue := self.queue(model_provider)) is None:
+            yield
+            return
+        tokens = estimate_tokens(inputs) + self.completion_tokens
+        ticket = queue.acquire(
+            session_id, tokens, on_position=lambda position: notify_position(handlers, position)
+        )
+        try:
+            yield
+        finally:
+            queue.release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self, model_provider: str, session_id: str, inputs: dict, handlers: list):
+        if (queue := self.queue(model_provider)) is None:
+            yield
+            return
+        tokens = estimate_tokens(inputs) + self.completion_tokens
+        ticket = await queue.aacquire(
+            session_id, tokens, on_position=lambda position: notify_position(handlers, position)
+        )
+        try:
+            yield
+        finally:
+            queue.release(ticket)
+
+
+SCHEDULER = Scheduler(**SCHEDULER_CONFIG)
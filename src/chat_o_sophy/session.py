@@ -0,0 +1,216 @@
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from functools import partial
+from typing import List, Optional
+from uuid import uuid4
+
+import utils.type_as as t
+from chat_o_sophy.chatbot import PhilosopherChatbot
+from chat_o_sophy.config import load_yaml
+from chat_o_sophy.history import ChatHistory
+from chat_o_sophy.memory import TokenWindowMemory
+from chat_o_sophy.store import CONVERSATION_STORE, STORE_CONFIG
+from utils.logging import configure_logger
+
+logger = configure_logger(__file__)
+
+SESSION_CONFIG = load_yaml("config/session.yaml")
+
+
+def resident_start(total: int, memory_state: dict) -> int:
+    start = total - STORE_CONFIG["resume_tail"]
+    if "window_start" in memory_state:
+        pinned = TokenWindowMemory.__fields__["pinned_messages"].default
+        start = min(start, pinned + memory_state["window_start"])
+    return start
+
+
+@dataclass(eq=False)
+class ChatSession:
+    philosopher: t.PhilosopherTypeAs
+    language: t.LanguageTypeAs
+    model_provider: t.ProviderTypeAs
+    model_name: t.ModelNameTypeAs
+    model_owner: t.ModelOwnerTypeAs = None
+    model_version: t.ModelVersionTypeAs = None
+    history: ChatHistory = field(default_factory=ChatHistory)
+    memory_state: dict = field(default_factory=dict)
+    conversation_id: str = field(default_factory=lambda: uuid4().hex)
+    last_access: float = field(default_factory=time.monotonic, repr=False)
+    _chatbot: Optional[PhilosopherChatbot] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self.lock = threading.Lock()
+        if CONVERSATION_STORE is not None and self.history.loader is None:
+            self.history.loader = partial(CONVERSATION_STORE.load_turns, self.conversation_id)
+
+    @property
+    def chatbot(self) -> PhilosopherChatbot:
+        with self.lock:
+            self.last_access = time.monotonic()
+            if self._chatbot is None:
+                self._chatbot = PhilosopherChatbot(
+                    philosopher=self.philosopher,
+                    model_provider=self.model_provider,
+                    model_name=self.model_name,
+                    model_owner=self.model_owner,
+                    model_version=self.model_version,
+                    history=self.history,
+                    memory_state=self.memory_state,
+                    conversation_id=self.conversation_id,
+                    store=CONVERSATION_STORE,
+                )
+            return self._chatbot
+
+    @property
+    def loaded(self) -> bool:
+        return self._chatbot is not None
+
+    def evict(self) -> bool:
+        with self.lock:
+            if self._chatbot is None:
+                return False
+            self.memory_state = self._chatbot.memory_state
+            self._chatbot = None
+            self.history.page_out(resident_start(self.history.total, self.memory_state))
+            return True
+
+    def expire(self) -> bool:
+        with self.lock:
+            if self._chatbot is None and not self.history.records:
+                return False
+            self._chatbot = None
+            self.history.clear()
+            self.memory_state = {}
+            return True
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            if self._chatbot is not None:
+                self.memory_state = self._chatbot.memory_state
+        return {
+            "philosopher": self.philosopher,
+            "language": self.language,
+            "model_provider": self.model_provider,
+            "model_name": self.model_name,
+            "model_owner": self.model_owner,
+            "model_version": self.model_version,
+            "history": [[record.role, record.content] for record in self.history.slice()],
+            "offset": self.history.offset,
+            "memory_state": dict(self.memory_state),
+            "conversation_id": self.conversation_id,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "ChatSession":
+        state = dict(state)
+        history = ChatHistory(offset=state.pop("offset", 0))
+        for role, content in state.pop("history", []):
+            history.append(role, content)
+        return cls(history=history, **state)
+
+    @classmethod
+    def resume(cls, conversation_id: str) -> Optional["ChatSession"]:
+        if CONVERSATION_STORE is None:
+            return None
+        if (state := CONVERSATION_STORE.load_state(conversation_id)) is None:
+            return None
+        memory_state = state.get("memory_state", {})
+        history = CONVERSATION_STORE.load_history(
+            conversation_id,
+            state,
+            start=resident_start(CONVERSATION_STORE.count(conversation_id), memory_state),
+        )
+        return cls(
+            philosopher=state["philosopher"],
+            language=state["language"],
+            model_provider=state["model_provider"],
+            model_name=state["model_name"],
+            model_owner=state["model_owner"],
+            model_version=state["model_version"],
+            history=history,
+            memory_state=memory_state,
+            conversation_id=conversation_id,
+        )
+
+    def memory_report(self) -> dict:
+        records = self.history.records
+        return {
+            "philosopher": self.philosopher,
+            "model": self.model_name,
+            "messages": self.history.total,
+            "resident_messages": len(records),
+            "history_bytes": sys.getsizeof(records)
+            + sum(sys.getsizeof(record) + sys.getsizeof(record.content) for record in records),
+            "summary_bytes": sys.getsizeof(self.memory_state.get("summary", "")),
+            "chatbot_loaded": self.loaded,
+            "idle_seconds": round(time.monotonic() - self.last_access, 1),
+        }
+
+
+class SessionRegistry:
+    def __init__(self, idle_ttl: float, expire_ttl: float, sweep_interval: float):
+        self.idle_ttl = idle_ttl
+        self.expire_ttl = expire_ttl
+        self.sweep_interval = sweep_interval
+        self.sessions: "weakref.WeakSet[ChatSession]" = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    def register(self, session: ChatSession) -> ChatSession:
+        with self.lock:
+            self.sessions.add(session)
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="session_sweeper", daemon=True
+                )
+                self.thread.start()
+        return session
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            sessions = list(self.sessions)
+        evicted = expired = 0
+        for session in sessions:
+            idle = now - session.last_access
+            if CONVERSATION_STORE is None and idle > self.expire_ttl:
+                expired += session.expire()
+            elif idle > self.idle_ttl:
+                evicted += session.evict()
+        if evicted or expired:
+            logger.info(
+                f"Evicted {evicted} idle chatbot(s) and expired {expired} conversation(s) "
+                f"out of {len(sessions)} session(s)"
+            )
+        return evicted + expired
+
+    def run(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+                if (totals := self.totals())["sessions"]:
+                    logger.info("Session memory", extra=totals)
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def report(self) -> List[dict]:
+        with self.lock:
+            sessions = list(self.sessions)
+        return [session.memory_report() for session in sessions]
+
+    def totals(self) -> dict:
+        report = self.report()
+        return {
+            "sessions": len(report),
+            "loaded_chatbots": sum(session["chatbot_loaded"] for session in report),
+            "resident_messages": sum(session["resident_messages"] for session in report),
+            "history_bytes": sum(session["history_bytes"] for session in report),
+        }
+
+
+SESSIONS = SessionRegistry(**SESSION_CONFIG)
@@ -1,8 +1,8 @@
 import os
 
-import requests
 import streamlit as st
 
+from utils.http import get_session
 from utils.logging import configure_logger
 
 logger = configure_logger(__file__)
@@ -88,7 +88,7 @@ class LakeraAPIManager:
     @staticmethod
     @st.cache_data(show_spinner=False)
     def authentificate_lakera_guard(api_key):
-        response = requests.post(
+        response = get_session().post(
             url="https://api.lakera.ai/v1/prompt_injection",
             json={"input": "<AUTHENTIFICATION TEST>"},
             headers={"Authorization": f"Bearer {api_key}"},
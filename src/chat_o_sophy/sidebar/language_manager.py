@@ -18,7 +18,7 @@ class LanguageManager:
         self.selected_language = default_language
 
     def reset_state(self):
-        st.session_state.chatbot = None
+        st.session_state.chat_session = None
         st.session_state.current_choice = None
 
     def choose_language(self):
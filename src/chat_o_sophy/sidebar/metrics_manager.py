@@ -0,0 +1,27 @@
+import streamlit as st
+
+from chat_o_sophy.metrics import METRICS
+from utils.logging import configure_logger
+
+logger = configure_logger(__file__)
+
+
+class MetricsManager:
+    def show_summary(self):
+        if summary := METRICS.summary():
+            st.dataframe(summary, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No LLM calls recorded yet")
+
+    def download(self):
+        st.download_button(
+            label="Download Prometheus metrics",
+            data=METRICS.export_prometheus(),
+            file_name="chat_o_sophy_metrics.prom",
+            mime="text/plain",
+            use_container_width=True,
+        )
+
+    def main(self):
+        self.show_summary()
+        self.download()
@@ -1,20 +1,14 @@
 import os
 
-import requests
 import streamlit as st
-import yaml
 
+from chat_o_sophy.config import CONFIG
+from utils.http import get_session
 from utils.logging import configure_logger
 
 logger = configure_logger(__file__)
 
 
-with open("config/models.yaml") as f:
-    MODELS = yaml.safe_load(f)
-with open("config/providers.yaml") as f:
-    PROVIDERS = yaml.safe_load(f)
-
-
 class ModelAPIManager:
     def __init__(self, default_provider="openai", default_model="gpt-3.5-turbo"):
         self.model_provider = default_provider
@@ -23,31 +17,32 @@ class ModelAPIManager:
         self.api_keys = {
             model_provider: {"api_key": "", "default": True}
             for model_provider in {
-                model_info["model_provider"] for model_info in MODELS.values()
+                model.model_provider for model in CONFIG.models.values()
             }
         }
 
     def reset_state(self):
         self.authentificated = False
-        st.session_state.chatbot = None
+        st.session_state.chat_session = None
         st.session_state.current_choice = None
 
     def choose_model(self):
         self.chosen_model = st.selectbox(
             label="Select the model:",
-            options=MODELS.keys(),
+            options=CONFIG.models.keys(),
             key="model_api_manager.chosen_model",
-            index=list(MODELS.keys()).index(
+            index=list(CONFIG.models.keys()).index(
                 st.session_state.get("model_api_manager.chosen_model", self.chosen_model)
             ),
             help="Recommended: `gpt-3.5-turbo`",
             on_change=self.reset_state,
         )
 
-        self.model_provider = MODELS[self.chosen_model]["model_provider"]
-        self.model_owner = MODELS[self.chosen_model]["model_owner"]
-        self.model_version = MODELS[self.chosen_model]["model_version"]
-        self.experimental_flag = MODELS[self.chosen_model]["experimental_flag"]
+        model = CONFIG.models[self.chosen_model]
+        self.model_provider = model.model_provider
+        self.model_owner = model.model_owner
+        self.model_version = model.model_version
+        self.experimental_flag = model.experimental_flag
 
         if self.experimental_flag:
             st.info(
@@ -80,8 +75,8 @@ class ModelAPIManager:
 
     def api_key_form(self):
         with st.form(self.model_provider):
-            provider_label = PROVIDERS[self.model_provider]["label"]
-            provider_help = PROVIDERS[self.model_provider]["api_help"]
+            provider_label = CONFIG.providers[self.model_provider].label
+            provider_help = CONFIG.providers[self.model_provider].api_help
 
             self.api_keys[self.model_provider]["api_key"] = st.text_input(
                 label=f"Enter your {provider_label} API key:",
@@ -117,8 +112,8 @@ class ModelAPIManager:
             )
 
     def authentificate(self, api_key, model_provider, model_name, model_owner):
-        provider_label = PROVIDERS[self.model_provider]["label"]
-        provider_env_var = PROVIDERS[model_provider]["env_var"]
+        provider_label = CONFIG.providers[self.model_provider].label
+        provider_env_var = CONFIG.providers[model_provider].env_var
 
         if model_provider == "openai":
             success = self.authentificate_openai(api_key, model_name)
@@ -138,7 +133,7 @@ class ModelAPIManager:
     @staticmethod
     @st.cache_data(show_spinner=False)
     def authentificate_openai(api_key, model_name):
-        response = requests.get(
+        response = get_session().get(
             url=f"https://api.openai.com/v1/models/{model_name}",
             headers={"Authorization": f"Bearer {api_key}"},
         )
@@ -147,14 +142,14 @@ class ModelAPIManager:
     @staticmethod
     @st.cache_data(show_spinner=False)
     def authentificate_replicate(api_key, model_owner, model_name):
-        response = requests.get(
+        response = get_session().get(
             url=f"https://api.replicate.com/v1/models/{model_owner}/{model_name}",
             headers={"Authorization": f"Token {api_key}"},
         )
         return response.ok
 
     def show_status(self):
-        provider_label = PROVIDERS[self.model_provider]["label"]
+        provider_label = CONFIG.providers[self.model_provider].label
 
         if self.authentificated:
             st.success(f"Successfully authentificated to {provider_label} API", icon="🔐")
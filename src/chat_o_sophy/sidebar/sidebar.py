@@ -2,6 +2,7 @@ import streamlit as st
 
 from .lakera_api_manager import LakeraAPIManager
 from .language_manager import LanguageManager
+from .metrics_manager import MetricsManager
 from .model_api_manager import ModelAPIManager
 
 
@@ -10,6 +11,7 @@ class Sidebar:
         self.language_manager = LanguageManager()
         self.model_api_manager = ModelAPIManager()
         self.lakera_api_manager = LakeraAPIManager()
+        self.metrics_manager = MetricsManager()
 
     def main(self):
         with st.sidebar:
@@ -20,3 +22,5 @@ class Sidebar:
                 self.model_api_manager.main()
             with st.expander("Lakera Guard", expanded=False):
                 self.lakera_api_manager.main()
+            with st.expander("Metrics", expanded=False):
+                self.metrics_manager.main()
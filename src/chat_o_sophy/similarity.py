@@ -0,0 +1,215 @@
+import random
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import count
+from typing import (Dict, FrozenSet, Iterable, List, Mapping, Optional, Set,
+                    Tuple)
+
+from chat_o_sophy.config import load_yaml
+from utils.logging import configure_logger
+
+logger = configure_logger(__file__)
+
+SIMILARITY_CONFIG = load_yaml("config/similarity.yaml")
+
+MERSENNE_PRIME = (1 << 61) - 1
+STOPWORDS = frozenset(
+    "a an the of to in on at for from by with and or is are was were be been being am "
+    "do does did it its this that these those there their his her he she they them "
+    "i me my we our us you your about according some any".split()
+)
+NEGATIONS = frozenset("not no never nothing nobody none neither nor cannot without".split())
+SUFFIXES = ("ness", "ful", "ing", "ed", "es", "s")
+CONTRACTIONS = re.compile(r"n't\b|'(s|re|ve|ll|d|m)\b")
+WORDS = re.compile(r"\w+")
+
+
+def stem(word: str) -> str:
+    stemmed = True
+    while stemmed:
+        stemmed = False
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word, stemmed = word[: -len(suffix)], True
+                break
+    return word
+
+
+def shingles(question: str) -> FrozenSet[str]:
+    text = CONTRACTIONS.sub(
+        lambda match: " not" if match.group(0) == "n't" else "",
+        question.lower().replace("’", "'"),
+    )
+    return frozenset(
+        word if word in NEGATIONS else stem(word)
+        for word in WORDS.findall(text)
+        if word not in STOPWORDS
+    )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if (a ^ b) & NEGATIONS:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int, seed: int = 0):
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+        self.token_hashes = lru_cache(maxsize=2**16)(self.permute)
+
+    def permute(self, token: str) -> Tuple[int, ...]:
+        h = zlib.crc32(token.encode())
+        return tuple((a * h + b) % MERSENNE_PRIME for a, b in self.permutations)
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(map(min, zip(*(self.token_hashes(token) for token in tokens))))
+
+
+class LSHIndex:
+    def __init__(self, bands: int, rows: int):
+        self.rows = rows
+        self.buckets: List[Dict[tuple, Set[int]]] = [{} for _ in range(bands)]
+
+    def band_keys(self, signature: Tuple[int, ...]):
+        for band, buckets in enumerate(self.buckets):
+            yield buckets, signature[band * self.rows : (band + 1) * self.rows]
+
+    def add(self, entry_id: int, signature: Tuple[int, ...]) -> None:
+        for buckets, key in self.band_keys(signature):
+            buckets.setdefault(key, set()).add(entry_id)
+
+    def remove(self, entry_id: int, signature: Tuple[int, ...]) -> None:
+        for buckets, key in self.band_keys(signature):
+            bucket = buckets[key]
+            bucket.discard(entry_id)
+            if not bucket:
+                del buckets[key]
+
+    def candidates(self, signature: Tuple[int, ...]) -> Set[int]:
+        found: Set[int] = set()
+        for buckets, key in self.band_keys(signature):
+            found.update(buckets.get(key, ()))
+        return found
+
+
+@dataclass(frozen=True)
+class StoredAnswers:
+    question: str
+    tokens: FrozenSet[str]
+    answers: Mapping[str, str]
+    synthesis_text: Optional[str] = None
+    synthesis_table: Optional[str] = None
+
+
+class QuestionIndex:
+    def __init__(
+        self, enabled: bool, threshold: float, num_perm: int, bands: int, max_entries: int
+    ):
+        if num_perm % bands:
+            raise ValueError("Similarity num_perm must be a multiple of bands")
+        if not 0 < threshold <= 1:
+            raise ValueError("Similarity threshold must be in (0, 1]")
+        self.enabled = enabled
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm)
+        self.indexes: Dict[tuple, LSHIndex] = {}
+        self.entries: OrderedDict = OrderedDict()
+        self.ids = count()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "QuestionIndex":
+        return cls(**config)
+
+    @staticmethod
+    def scope(philosophers, language, model_provider, model_name, model_version) -> tuple:
+        return (tuple(sorted(philosophers)), language, model_provider, model_name, model_version)
+
+    def best_match(
+        self, scope: tuple, tokens: FrozenSet[str], signature: Tuple[int, ...]
+    ) -> Tuple[Optional[int], float]:
+        best_id, best_similarity = None, 0.0
+        if (index := self.indexes.get(scope)) is None:
+            return best_id, best_similarity
+        for entry_id in index.candidates(signature):
+            similarity = jaccard(tokens, self.entries[entry_id][2].tokens)
+            if similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+        return best_id, best_similarity
+
+    def lookup(self, question: str, scope: tuple) -> Optional[Tuple[StoredAnswers, float]]:
+        if not self.enabled or not (tokens := shingles(question)):
+            return None
+        signature = self.hasher.signature(tokens)
+        with self.lock:
+            entry_id, similarity = self.best_match(scope, tokens, signature)
+            if entry_id is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(entry_id)
+            return self.entries[entry_id][2], similarity
+
+    def add(
+        self,
+        question: str,
+        scope: tuple,
+        answers: Mapping[str, str],
+        synthesis_text: Optional[str] = None,
+        synthesis_table: Optional[str] = None,
+    ) -> None:
+        if not self.enabled or not (tokens := shingles(question)):
+            return
+        signature = self.hasher.signature(tokens)
+        stored = StoredAnswers(
+            question=question,
+            tokens=tokens,
+            answers=dict(answers),
+            synthesis_text=synthesis_text,
+            synthesis_table=synthesis_table,
+        )
+        with self.lock:
+            entry_id, similarity = self.best_match(scope, tokens, signature)
+            if entry_id is not None and similarity == 1.0:
+                self.remove(entry_id)
+            entry_id = next(self.ids)
+            self.indexes.setdefault(scope, LSHIndex(self.bands, self.rows)).add(
+                entry_id, signature
+            )
+            self.entries[entry_id] = (scope, signature, stored)
+            while len(self.entries) > self.max_entries:
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, entry_id: int) -> None:
+        scope, signature, _ = self.entries.pop(entry_id)
+        index = self.indexes[scope]
+        index.remove(entry_id, signature)
+        if not index.buckets[0]:
+            del self.indexes[scope]
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "scopes": len(self.indexes),
+        }
+
+
+QUESTION_INDEX = QuestionIndex.from_config(SIMILARITY_CONFIG)
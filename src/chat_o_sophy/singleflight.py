@@ -0,0 +1,220 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.callbacks.manager import handle_event
+
+from chat_o_sophy.config import load_yaml
+from chat_o_sophy.scheduler import notify_position
+from utils.logging import bind_context, configure_logger
+
+logger = configure_logger(__file__)
+
+SINGLEFLIGHT_CONFIG = load_yaml("config/singleflight.yaml")
+
+
+class FlightCancelled(Exception):
+    def __init__(self, key: str):
+        super().__init__(f"Generation {key[:12]} lost all its subscribers")
+        self.key = key
+
+
+class Flight(BaseCallbackHandler):
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, key: str):
+        self.key = key
+        self.events: List[tuple] = []
+        self.condition = threading.Condition()
+        self.wakers: Set[Callable[[], object]] = set()
+        self.subscribers = 0
+        self.cancelled = False
+        self.done = False
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+    def publish(self, event_name: str, *args) -> None:
+        with self.condition:
+            self.events.append((event_name, args))
+            self.wake()
+
+    def on_llm_start(self, serialized, prompts, *args, **kwargs):
+        self.publish("on_llm_start", serialized, prompts)
+
+    def on_chat_model_start(self, serialized, messages, *args, **kwargs):
+        self.publish("on_chat_model_start", serialized, messages)
+
+    def check_subscribers(self) -> None:
+        with self.condition:
+            if self.subscribers == 0:
+                self.cancelled = True
+                raise FlightCancelled(self.key)
+
+    def on_queue_position(self, position: int):
+        self.check_subscribers()
+        self.publish("on_queue_position", position)
+
+    def on_llm_new_token(self, token: str, *args, **kwargs):
+        self.check_subscribers()
+        self.publish("on_llm_new_token", token)
+
+    def on_llm_end(self, response, *args, **kwargs):
+        self.publish("on_llm_end", response)
+
+    def on_llm_error(self, error: BaseException, *args, **kwargs):
+        if not isinstance(error, FlightCancelled):
+            self.publish("on_llm_error", error)
+
+    def join(self) -> bool:
+        with self.condition:
+            if self.cancelled or self.done:
+                return False
+            self.subscribers += 1
+            return True
+
+    def leave(self) -> None:
+        with self.condition:
+            self.subscribers -= 1
+
+    def finish(self, result: Optional[str], error: Optional[BaseException]) -> None:
+        with self.condition:
+            self.result, self.error = result, error
+            self.done = True
+            self.wake()
+
+    def wake(self) -> None:
+        self.condition.notify_all()
+        for waker in self.wakers:
+            waker()
+
+    def poll(self, index: int) -> Tuple[list, bool]:
+        return self.events[index:], self.done
+
+    @staticmethod
+    def dispatch(events: list, handlers: list, run_id) -> None:
+        for event_name, args in events:
+            if event_name == "on_queue_position":
+                notify_position(handlers, *args)
+            else:
+                handle_event(handlers, event_name, "ignore_llm", *args, run_id=run_id)
+
+    def outcome(self) -> str:
+        if self.error is not None:
+            raise self.error
+        assert self.result is not None
+        return self.result
+
+    def subscribe(self, handlers: list) -> str:
+        run_id, index = uuid4(), 0
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: index < len(self.events) or self.done)
+                    events, done = self.poll(index)
+                index += len(events)
+                self.dispatch(events, handlers, run_id)
+                if done:
+                    break
+        finally:
+            self.leave()
+        return self.outcome()
+
+    async def asubscribe(self, handlers: list) -> str:
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        waker = partial(loop.call_soon_threadsafe, changed.set)
+        run_id, index = uuid4(), 0
+        with self.condition:
+            self.wakers.add(waker)
+        try:
+            while True:
+                changed.clear()
+                with self.condition:
+                    events, done = self.poll(index)
+                index += len(events)
+                self.dispatch(events, handlers, run_id)
+                if done:
+                    break
+                if not events:
+                    await changed.wait()
+        finally:
+            with self.condition:
+                self.wakers.discard(waker)
+            self.leave()
+        return self.outcome()
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool, max_workers: int):
+        self.enabled = enabled
+        self.flights: Dict[str, Flight] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="single_flight"
+        )
+
+    def attach(self, key: str) -> Tuple[Flight, bool]:
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None or not flight.join():
+                flight = self.flights[key] = Flight(key)
+                flight.join()
+                return flight, True
+        logger.info(f"Coalesced generation {key[:12]}")
+        return flight, False
+
+    def detach(self, flight: Flight) -> None:
+        with self.lock:
+            if self.flights.get(flight.key) is flight:
+                del self.flights[flight.key]
+
+    def run(self, key: str, generate: Callable[[list], str], handlers: list) -> str:
+        if not self.enabled:
+            return generate(handlers)
+        flight, leader = self.attach(key)
+        if leader:
+            self.executor.submit(bind_context(self.execute, flight, generate))
+        return flight.subscribe(handlers)
+
+    async def arun(
+        self, key: str, agenerate: Callable[[list], Awaitable[str]], handlers: list
+    ) -> str:
+        if not self.enabled:
+            return await agenerate(handlers)
+        flight, leader = self.attach(key)
+        if leader:
+            task = asyncio.ensure_future(self.aexecute(flight, agenerate))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return await flight.asubscribe(handlers)
+
+    def settle(self, flight: Flight, result: Optional[str], error: Optional[BaseException]) -> None:
+        self.detach(flight)
+        flight.finish(result, error)
+        if isinstance(error, FlightCancelled):
+            logger.info(f"Cancelled generation {flight.key[:12]}")
+
+    def execute(self, flight: Flight, generate: Callable[[list], str]) -> None:
+        try:
+            result = generate([flight])
+        except BaseException as error:
+            self.settle(flight, None, error)
+        else:
+            self.settle(flight, result, None)
+
+    async def aexecute(self, flight: Flight, agenerate: Callable[[list], Awaitable[str]]) -> None:
+        try:
+            result = await agenerate([flight])
+        except BaseException as error:
+            self.settle(flight, None, error)
+        else:
+            self.settle(flight, result, None)
+
+
+SINGLE_FLIGHT = SingleFlight(**SINGLEFLIGHT_CONFIG)
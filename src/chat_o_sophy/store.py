@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import List, Optional
+
+from chat_o_sophy.config import ROOT_DIR, load_yaml
+from chat_o_sophy.history import ChatHistory, ChatMessage
+from utils.logging import configure_logger
+
+logger = configure_logger(__file__)
+
+STORE_CONFIG = load_yaml("config/store.yaml")
+
+
+class ConversationStore:
+    def __init__(self, path: str, ttl: Optional[float] = None, purge_interval: float = 3600):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS conversations "
+            "(id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS turns "
+            "(conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, "
+            "content TEXT NOT NULL, PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID;"
+        )
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.purged_at = 0.0
+        self.purge()
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["ConversationStore"]:
+        if not config["enabled"]:
+            return None
+        return cls(
+            path=str(ROOT_DIR / config["path"]),
+            ttl=config["ttl"],
+            purge_interval=config["purge_interval"],
+        )
+
+    def purge(self) -> int:
+        if self.ttl is None:
+            return 0
+        self.purged_at = time.time()
+        expired_before = self.purged_at - self.ttl
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM turns WHERE conversation_id IN "
+                "(SELECT id FROM conversations WHERE updated_at < ?)",
+                (expired_before,),
+            )
+            purged = self.connection.execute(
+                "DELETE FROM conversations WHERE updated_at < ?", (expired_before,)
+            ).rowcount
+        if purged:
+            logger.info(f"Purged {purged} conversations older than {self.ttl}s")
+        return purged
+
+    def save(self, conversation_id: str, state: dict, history: ChatHistory) -> None:
+        start = history.persisted
+        rows = [
+            (conversation_id, seq, record.role, record.content)
+            for seq, record in enumerate(history.slice(start), start)
+        ]
+        state = {**state, "offset": history.offset, "digest": history.digest}
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?)", rows
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)",
+                (conversation_id, json.dumps(state, ensure_ascii=False), time.time()),
+            )
+        history.persisted = start + len(rows)
+        if time.time() - self.purged_at > self.purge_interval:
+            self.purge()
+
+    def load_state(self, conversation_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT state FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def count(self, conversation_id: str) -> int:
+        with self.lock:
+            (count,) = self.connection.execute(
+                "SELECT COUNT(*) FROM turns WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()
+        return count
+
+    def load_turns(self, conversation_id: str, start: int, stop: int) -> List[ChatMessage]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT role, content FROM turns "
+                "WHERE conversation_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (conversation_id, start, stop),
+            ).fetchall()
+        return [ChatMessage(role, content) for role, content in rows]
+
+    def load_history(self, conversation_id: str, state: dict, start: int) -> ChatHistory:
+        total = self.count(conversation_id)
+        start = max(0, min(start, total))
+        history = ChatHistory(
+            offset=state.get("offset", 0),
+            base=start,
+            digest=state.get("digest", ""),
+            loader=partial(self.load_turns, conversation_id),
+        )
+        history.records = self.load_turns(conversation_id, start, total)
+        history.persisted = total
+        return history
+
+
+CONVERSATION_STORE = ConversationStore.from_config(STORE_CONFIG)
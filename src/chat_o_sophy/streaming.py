@@ -0,0 +1,169 @@
+import asyncio
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import (AsyncIterator, Awaitable, Callable, Iterator, Optional,
+                    Union)
+from uuid import uuid4
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.callbacks.manager import handle_event
+from langchain.schema import Generation, LLMResult
+
+from chat_o_sophy.callbacks import STREAMING_CONFIG
+from chat_o_sophy.event_loop import EVENT_LOOP
+from chat_o_sophy.scheduler import notify_position
+from utils.logging import bind_context, configure_logger
+
+logger = configure_logger(__file__)
+
+STREAM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=STREAMING_CONFIG["max_streams"], thread_name_prefix="stream"
+)
+
+
+@dataclass(frozen=True)
+class StreamResult:
+    text: str
+    cached: bool = False
+
+
+class StreamClosed(Exception):
+    pass
+
+
+class QueuePosition:
+    __slots__ = ("position",)
+
+    def __init__(self, position: int):
+        self.position = position
+
+
+class StreamError:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class QueueCallbackHandler(BaseCallbackHandler):
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, stream: "TokenStream"):
+        self.stream = stream
+
+    def on_queue_position(self, position: int):
+        self.stream.push(QueuePosition(position))
+
+    def on_llm_new_token(self, token: str, *args, **kwargs):
+        self.stream.push(token)
+
+
+class TokenStream:
+    def __init__(
+        self,
+        respond: Callable[[list], StreamResult],
+        arespond: Optional[Callable[[list], Awaitable[StreamResult]]] = None,
+    ):
+        self.respond = respond
+        self.arespond = arespond
+        self.closed = False
+        self.started = False
+        self.on_queue_position: Optional[Callable[[int], None]] = None
+
+    def start(self, put: Callable) -> None:
+        if self.started:
+            raise RuntimeError("A TokenStream can only be consumed once")
+        self.started = True
+        self.put = put
+        if self.arespond is not None and STREAMING_CONFIG["async_execution"]:
+            EVENT_LOOP.submit(self.aproduce())
+        else:
+            STREAM_EXECUTOR.submit(bind_context(self.produce))
+
+    def produce(self) -> None:
+        item: Union[StreamResult, StreamError]
+        try:
+            item = self.respond([QueueCallbackHandler(self)])
+        except BaseException as error:
+            item = StreamError(error)
+        self.finish(item)
+
+    async def aproduce(self) -> None:
+        assert self.arespond is not None
+        item: Union[StreamResult, StreamError]
+        try:
+            item = await self.arespond([QueueCallbackHandler(self)])
+        except BaseException as error:
+            item = StreamError(error)
+        self.finish(item)
+
+    def finish(self, item: Union[StreamResult, StreamError]) -> None:
+        try:
+            self.put(item)
+        except RuntimeError:
+            logger.debug("Stream consumer went away before the result")
+
+    def push(self, item: Union[str, QueuePosition]) -> None:
+        if self.closed:
+            raise StreamClosed()
+        self.put(item)
+
+    def unwrap(self, item) -> Optional[Union[str, StreamResult]]:
+        if isinstance(item, StreamError):
+            raise item.error
+        if isinstance(item, QueuePosition):
+            if self.on_queue_position is not None:
+                self.on_queue_position(item.position)
+            return None
+        return item
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __iter__(self) -> Iterator[Union[str, StreamResult]]:
+        items: queue.SimpleQueue = queue.SimpleQueue()
+        self.start(items.put)
+        try:
+            while True:
+                if (item := self.unwrap(items.get())) is None:
+                    continue
+                yield item
+                if isinstance(item, StreamResult):
+                    return
+        finally:
+            self.close()
+
+    async def __aiter__(self) -> AsyncIterator[Union[str, StreamResult]]:
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        self.start(lambda item: loop.call_soon_threadsafe(items.put_nowait, item))
+        try:
+            while True:
+                if (item := self.unwrap(await items.get())) is None:
+                    continue
+                yield item
+                if isinstance(item, StreamResult):
+                    return
+        finally:
+            self.close()
+
+
+def consume(stream: TokenStream, handlers: list) -> StreamResult:
+    run_id = uuid4()
+    stream.on_queue_position = partial(notify_position, handlers)
+    handle_event(handlers, "on_llm_start", "ignore_llm", {}, [], run_id=run_id)
+    try:
+        for item in stream:
+            if isinstance(item, StreamResult):
+                result = item
+            else:
+                handle_event(handlers, "on_llm_new_token", "ignore_llm", item, run_id=run_id)
+    except BaseException as error:
+        handle_event(handlers, "on_llm_error", "ignore_llm", error, run_id=run_id)
+        raise
+    response = LLMResult(generations=[[Generation(text=result.text)]])
+    handle_event(handlers, "on_llm_end", "ignore_llm", response, run_id=run_id)
+    return result
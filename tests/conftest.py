@@ -0,0 +1,44 @@
+from typing import Callable, Optional
+from uuid import uuid4
+
+import pytest
+
+from chat_o_sophy.chatbot import PhilosopherChatbot
+
+
+class Container:
+    def markdown(self, *args, **kwargs):
+        pass
+
+    def caption(self, *args, **kwargs):
+        pass
+
+    def empty(self):
+        pass
+
+
+@pytest.fixture
+def container() -> Container:
+    return Container()
+
+
+@pytest.fixture
+def fake_model_version() -> Callable[..., str]:
+    def model_version(tokens: int = 5, tps: float = 1000) -> str:
+        return f"tokens={tokens};ttft=0;tps={tps};seed={uuid4().int % 1000}"
+
+    return model_version
+
+
+@pytest.fixture
+def fake_chatbot(fake_model_version) -> Callable[..., PhilosopherChatbot]:
+    def chatbot(mode: str = "single", model_version: Optional[str] = None) -> PhilosopherChatbot:
+        return PhilosopherChatbot(
+            philosopher="Plato",
+            model_provider="fake",
+            model_name="fake-chat",
+            model_version=model_version or fake_model_version(),
+            mode=mode,
+        )
+
+    return chatbot
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from chat_o_sophy.batch import read_questions
+
+
+def write_questions(tmp_path, *questions) -> str:
+    path = tmp_path / "questions.jsonl"
+    path.write_text("".join(json.dumps(question) + "\n" for question in questions))
+    return str(path)
+
+
+def test_valid_question_gets_an_id(tmp_path):
+    path = write_questions(
+        tmp_path,
+        {"question": "What is justice?", "philosophers": ["Plato"], "model": "gpt-3.5-turbo"},
+    )
+    (question,) = read_questions(path)
+    assert question["language"] == "English"
+    assert question["id"]
+
+
+@pytest.mark.parametrize("philosophers", [[], "Plato", None])
+def test_philosophers_must_be_a_non_empty_list(tmp_path, philosophers):
+    path = write_questions(
+        tmp_path,
+        {"question": "What is justice?", "philosophers": philosophers, "model": "gpt-3.5-turbo"},
+    )
+    with pytest.raises(ValueError, match="questions.jsonl:1: 'philosophers'"):
+        list(read_questions(path))
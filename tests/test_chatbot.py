@@ -0,0 +1,106 @@
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+
+from chat_o_sophy.cache import RESPONSE_CACHE
+from chat_o_sophy.config import CONFIG, MemoryConfig, Model
+from chat_o_sophy.llm_guard import GuardFlaggedError
+from chat_o_sophy.metrics import METRICS
+from chat_o_sophy.streaming import STREAMING_CONFIG
+
+LANGUAGE = "English"
+
+
+class DelayedGuard:
+    def __init__(self, flagged: bool, delay: float):
+        self.flagged = flagged
+        self.ready_at = time.monotonic() + delay
+
+    def done(self) -> bool:
+        return time.monotonic() >= self.ready_at
+
+    def check(self) -> None:
+        time.sleep(max(0.0, self.ready_at - time.monotonic()))
+        if self.flagged:
+            raise GuardFlaggedError({"flagged": True})
+
+
+@pytest.fixture(params=[False, True], ids=["thread", "event_loop"])
+def async_execution(request, monkeypatch):
+    monkeypatch.setitem(STREAMING_CONFIG, "async_execution", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("mode", ["single", "batch"])
+def test_flagged_prompt_never_reaches_memory_or_cache(
+    async_execution, fake_chatbot, container, mode
+):
+    chatbot = fake_chatbot(mode)
+    prompt = f"Flagged question {uuid4()}"
+    key = chatbot.cache_key(prompt, LANGUAGE)
+    with pytest.raises(GuardFlaggedError):
+        chatbot.chat(prompt, LANGUAGE, container=container, guard=DelayedGuard(True, 0.5))
+    assert len(chatbot.history) == 0
+    assert key not in RESPONSE_CACHE
+
+
+def test_released_prompt_is_committed(async_execution, fake_chatbot, container):
+    chatbot = fake_chatbot()
+    prompt = f"Safe question {uuid4()}"
+    key = chatbot.cache_key(prompt, LANGUAGE)
+    answer = chatbot.chat(prompt, LANGUAGE, container=container, guard=DelayedGuard(False, 0.2))
+    assert [record.content for record in chatbot.history.records] == [prompt, answer]
+    assert RESPONSE_CACHE.get(key) == answer
+
+
+def test_fresh_answer_skips_the_cache(
+    async_execution, fake_chatbot, fake_model_version, container
+):
+    model_version = fake_model_version()
+    prompt = f"Regenerated question {uuid4()}"
+    answer = fake_chatbot("multi", model_version).chat(prompt, LANGUAGE, container)
+    recorded = len(METRICS.records)
+
+    assert fake_chatbot("multi", model_version).chat(prompt, LANGUAGE, container) == answer
+    assert len(METRICS.records) == recorded
+    chatbot = fake_chatbot("multi", model_version)
+    key = chatbot.cache_key(prompt, LANGUAGE)
+    fresh = chatbot.chat(prompt, LANGUAGE, container, use_cache=False)
+
+    assert len(METRICS.records) == recorded + 1
+    assert RESPONSE_CACHE.get(key) == fresh
+
+
+def test_summary_runs_after_the_turn_and_may_fail(monkeypatch, fake_chatbot, container):
+    model = Model(
+        name="fake-chat",
+        model_provider="fake",
+        model_owner=None,
+        model_version=None,
+        experimental_flag=False,
+        memory=MemoryConfig(strategy="window", max_tokens=10, summarize=True),
+    )
+    models = {**CONFIG.models, "fake-chat": model}
+    monkeypatch.setattr(type(CONFIG), "models", property(lambda config: models))
+    chatbot = fake_chatbot()
+    started, release = threading.Event(), threading.Event()
+
+    def predict(text: str) -> str:
+        started.set()
+        release.wait(5)
+        raise RuntimeError("provider is down")
+
+    chatbot.predict = predict
+    for index in range(3):
+        chatbot.chat(f"Question {index} {uuid4()}", LANGUAGE, container=container)
+
+    assert started.wait(5)
+    assert chatbot.summarizing is not None and not chatbot.summarizing.done()
+    release.set()
+    chatbot.chat(f"Question 3 {uuid4()}", LANGUAGE, container=container)
+
+    assert chatbot.memory.window_start == 0
+    assert chatbot.memory.summary == ""
+    assert len(chatbot.history) == 8
@@ -0,0 +1,72 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.http import create_session
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def respond(self):
+        self.server.requests.append((self.command, self.client_address))
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if self.path == "/slow":
+            time.sleep(self.server.delay)
+        status = 503 if self.path == "/unavailable" else 200
+        body = b'{"ok": true}'
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    server.delay = 0.5
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reuses_one_connection(stub):
+    server, url = stub
+    session = create_session()
+    for _ in range(3):
+        assert session.get(f"{url}/ok").ok
+    assert session.post(f"{url}/ok", json={"input": "hi"}).ok
+    assert len(server.requests) == 4
+    assert len({client for _, client in server.requests}) == 1
+
+
+@pytest.mark.parametrize("method", ["get", "post"])
+def test_read_timeout_is_not_retried(stub, method):
+    server, url = stub
+    session = create_session(timeout=(1, 0.1), backoff_factor=0)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        getattr(session, method)(f"{url}/slow")
+    assert len(server.requests) == 1
+
+
+def test_unavailable_status_is_retried(stub):
+    server, url = stub
+    session = create_session(max_retries=2, backoff_factor=0)
+    assert session.get(f"{url}/unavailable").status_code == 503
+    assert len(server.requests) == 3
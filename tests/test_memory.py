@@ -0,0 +1,108 @@
+from typing import Optional
+
+import pytest
+
+from chat_o_sophy.history import ChatHistory
+from chat_o_sophy.memory import TokenWindowMemory
+from utils.tokens import count_tokens
+
+GREETING = ("Greet me.", "Hello, I am Plato.")
+
+
+def summarizer(summaries: list):
+    return lambda text: summaries.append(text) or f"summary {len(summaries)}"
+
+
+def window_memory(max_tokens: int, summaries: Optional[list] = None) -> TokenWindowMemory:
+    memory = TokenWindowMemory(
+        chat_memory=ChatHistory(),
+        memory_key="history",
+        input_key="input",
+        return_messages=True,
+        max_tokens=max_tokens,
+        summarizer=None if summaries is None else summarizer(summaries),
+        summary_prompt="{summary}|{new_lines}",
+    )
+    memory.save_context({"input": GREETING[0]}, {"text": GREETING[1]})
+    return memory
+
+
+def chat(memory: TokenWindowMemory, prompt: str, response: str) -> None:
+    memory.save_context({"input": prompt}, {"text": response})
+    memory.summarize()
+
+
+def turn(index: int, words: int = 10):
+    return (f"Question {index}? " + "why " * words, f"Answer {index}. " + "because " * words)
+
+
+def pinned_tokens() -> int:
+    return sum(count_tokens(text) for text in GREETING)
+
+
+def test_prune_evicts_whole_turns():
+    summaries = []
+    turns = [turn(index) for index in range(6)]
+    turn_tokens = sum(count_tokens(text) for text in turns[0])
+    summary_tokens = count_tokens("<Summary of the earlier conversation: summary 9>")
+    slack = count_tokens(turns[0][1]) + summary_tokens
+    memory = window_memory(pinned_tokens() + 3 * turn_tokens + slack, summaries)
+    for prompt, response in turns:
+        chat(memory, prompt, response)
+
+    assert memory.window_start % 2 == 0
+    messages = memory.buffer_as_messages
+    assert [message.content for message in messages[:2]] == list(GREETING)
+    assert messages[2].type == "system"
+    window = messages[3:]
+    assert [message.type for message in window] == ["human", "ai"] * (len(window) // 2)
+    assert window[-2:][0].content == turns[-1][0]
+    assert all(lines.count("Human:") == lines.count("AI:") for lines in summaries)
+
+
+def test_prune_keeps_an_oversized_latest_turn():
+    summaries = []
+    memory = window_memory(pinned_tokens() + 20, summaries)
+    prompt, response = turn(0, words=200)
+    chat(memory, prompt, response)
+
+    assert memory.window_start == 0
+    assert summaries == []
+    assert [message.content for message in memory.buffer_as_messages[2:]] == [prompt, response]
+
+    next_prompt, next_response = turn(1, words=200)
+    chat(memory, next_prompt, next_response)
+
+    assert memory.window_start == 2
+    assert len(summaries) == 1
+    assert [message.content for message in memory.buffer_as_messages[3:]] == [
+        next_prompt,
+        next_response,
+    ]
+
+
+def test_prune_drops_turns_without_a_summarizer():
+    memory = window_memory(pinned_tokens() + 20)
+    for index in range(2):
+        prompt, response = turn(index, words=200)
+        memory.save_context({"input": prompt}, {"text": response})
+
+    assert memory.window_start == 2
+    assert memory.summary == ""
+
+
+def test_failed_summary_keeps_the_window():
+    def fail(text):
+        raise RuntimeError("provider is down")
+
+    memory = window_memory(pinned_tokens() + 20)
+    memory.summarizer = fail
+    for index in range(2):
+        prompt, response = turn(index, words=200)
+        memory.save_context({"input": prompt}, {"text": response})
+    with pytest.raises(RuntimeError):
+        memory.summarize()
+
+    assert memory.window_start == 0
+    assert memory.summary == ""
+    assert len(memory.buffer_as_messages) == 6
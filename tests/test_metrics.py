@@ -0,0 +1,60 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from chat_o_sophy.metrics import METRICS, METRICS_CONFIG, MetricsRegistry
+
+LANGUAGE = "English"
+
+
+def test_only_the_generating_stream_is_recorded(fake_chatbot, fake_model_version, container):
+    model_version = fake_model_version(tokens=10, tps=20)
+    prompt = f"Coalesced question {uuid4()}"
+    recorded = len(METRICS.records)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(
+            fake_chatbot(model_version=model_version).chat, prompt, LANGUAGE, container
+        )
+        time.sleep(0.1)
+        follower = executor.submit(
+            fake_chatbot(model_version=model_version).chat, prompt, LANGUAGE, container
+        )
+        assert leader.result() == follower.result()
+    cached = fake_chatbot(model_version=model_version).chat(prompt, LANGUAGE, container)
+
+    assert cached == leader.result()
+    assert len(METRICS.records) == recorded + 1
+
+
+def test_records_are_written_on_flush(tmp_path):
+    registry = MetricsRegistry(
+        {
+            **METRICS_CONFIG,
+            "jsonl_path": str(tmp_path / "metrics.jsonl"),
+            "prometheus_path": str(tmp_path / "metrics.prom"),
+            "flush_interval_seconds": 3600,
+        }
+    )
+    record = {"provider": "fake", "model": "fake-chat", "philosopher": "Plato", "mode": "single"}
+    registry.record({**record, "latency_seconds": 1.5})
+
+    assert not (tmp_path / "metrics.jsonl").exists()
+    registry.flush()
+
+    lines = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    assert [json.loads(line)["latency_seconds"] for line in lines] == [1.5]
+    assert "chat_o_sophy_llm_latency_seconds_count" in (tmp_path / "metrics.prom").read_text()
+
+
+def test_summary_averages_each_label_set():
+    registry = MetricsRegistry({**METRICS_CONFIG, "jsonl_path": None, "prometheus_path": None})
+    record = {"provider": "fake", "model": "fake-chat", "philosopher": "Plato", "mode": "single"}
+    registry.record({**record, "latency_seconds": 1.0, "time_to_first_token_seconds": None})
+    registry.record({**record, "latency_seconds": 2.0, "time_to_first_token_seconds": 0.5})
+
+    (row,) = registry.summary()
+    assert row["count"] == 2
+    assert row["mean_latency_seconds"] == 1.5
+    assert row["mean_time_to_first_token_seconds"] == 0.5
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from chat_o_sophy.scheduler import ProviderQueue, SchedulerBusyError, Ticket
+
+
+def provider_queue(max_queue: int = 64) -> ProviderQueue:
+    return ProviderQueue(
+        name="fake", max_concurrency=1, tokens_per_minute=1_000_000, max_queue=max_queue
+    )
+
+
+def test_sessions_are_served_round_robin():
+    queue = provider_queue()
+    running = queue.enqueue(Ticket("holder", 10))
+    a1, a2, a3 = (queue.enqueue(Ticket("a", 10)) for _ in range(3))
+    b1 = queue.enqueue(Ticket("b", 10))
+
+    assert running.granted
+    assert [queue.position(ticket) for ticket in (a1, b1, a2, a3)] == [1, 2, 3, 4]
+
+    granted = []
+    for _ in range(4):
+        queue.release(running)
+        (running,) = [
+            ticket for ticket in (a1, a2, a3, b1) if ticket.granted and ticket not in granted
+        ]
+        granted.append(running)
+    assert granted == [a1, b1, a2, a3]
+
+
+def test_full_queue_is_busy():
+    queue = provider_queue(max_queue=2)
+    queue.enqueue(Ticket("holder", 10))
+    queue.enqueue(Ticket("a", 10))
+    queue.enqueue(Ticket("b", 10))
+
+    with pytest.raises(SchedulerBusyError) as error:
+        queue.enqueue(Ticket("c", 10))
+    assert error.value.provider == "fake"
+    assert len(queue) == 2
+
+
+def test_waiting_acquire_reports_its_position_and_resumes():
+    queue = provider_queue()
+    holder = queue.acquire("holder", 10)
+    positions, acquired = [], threading.Event()
+
+    def acquire():
+        queue.release(queue.acquire("a", 10, on_position=positions.append))
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(0.2)
+    queue.release(holder)
+    thread.join(timeout=5)
+
+    assert acquired.is_set()
+    assert positions == [1, 0]
+    assert queue.running == 0 and len(queue) == 0
@@ -0,0 +1,29 @@
+from uuid import uuid4
+
+from chat_o_sophy.session import ChatSession, SessionRegistry
+
+LANGUAGE = "English"
+
+
+def test_sweep_without_store_evicts_then_expires(fake_model_version, container):
+    registry = SessionRegistry(idle_ttl=10, expire_ttl=100, sweep_interval=3600)
+    session = registry.register(
+        ChatSession(
+            philosopher="Plato",
+            language=LANGUAGE,
+            model_provider="fake",
+            model_name="fake-chat",
+            model_version=fake_model_version(),
+        )
+    )
+    session.chatbot.chat(f"Question {uuid4()}", LANGUAGE, container=container)
+
+    assert registry.sweep(now=session.last_access + 50) == 1
+    assert not session.loaded
+    assert session.history.total == 2
+    assert registry.totals()["resident_messages"] == 2
+
+    assert registry.sweep(now=session.last_access + 200) == 1
+    assert session.history.total == 0
+    assert session.memory_state == {}
+    assert registry.sweep(now=session.last_access + 300) == 0
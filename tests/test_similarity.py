@@ -0,0 +1,43 @@
+import pytest
+
+from chat_o_sophy.similarity import SIMILARITY_CONFIG, QuestionIndex
+
+SCOPE = QuestionIndex.scope(["Plato", "Kant"], "English", "fake", "fake-chat", None)
+QUESTION = "Why is life worth living?"
+
+
+@pytest.fixture
+def index() -> QuestionIndex:
+    index = QuestionIndex(**{**SIMILARITY_CONFIG, "enabled": True})
+    index.add(QUESTION, SCOPE, answers={"Plato": "Because.", "Kant": "Duty."})
+    return index
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Why is life not worth living?",
+        "Why isn't life worth living?",
+        "Why is life never worth living?",
+        "Why is nothing worth living?",
+    ],
+)
+def test_negated_paraphrase_is_a_miss(index, question):
+    assert index.lookup(question, SCOPE) is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    ["why is life worth living", "Why is the life worth living?", "Why is life worth living"],
+)
+def test_paraphrase_is_a_hit(index, question):
+    match = index.lookup(question, SCOPE)
+    assert match is not None
+    stored, similarity = match
+    assert stored.question == QUESTION
+    assert similarity >= index.threshold
+
+
+def test_lookup_is_scoped(index):
+    other_scope = QuestionIndex.scope(["Plato"], "English", "fake", "fake-chat", None)
+    assert index.lookup(QUESTION, other_scope) is None
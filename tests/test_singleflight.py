@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+from langchain.callbacks.base import BaseCallbackHandler
+
+from chat_o_sophy.singleflight import FlightCancelled, SingleFlight
+
+TOKENS = 20
+TEXT = "".join(f"t{index} " for index in range(TOKENS))
+
+
+class Disconnected(Exception):
+    pass
+
+
+class Client(BaseCallbackHandler):
+    raise_error = True
+
+    def __init__(self, disconnect_after=None):
+        self.tokens = []
+        self.disconnect_after = disconnect_after
+
+    def on_llm_new_token(self, token: str, *args, **kwargs):
+        if len(self.tokens) == self.disconnect_after:
+            raise Disconnected
+        self.tokens.append(token)
+
+
+class Generation:
+    def __init__(self):
+        self.emitted = 0
+        self.error = None
+        self.finished = threading.Event()
+
+    def __call__(self, callbacks: list) -> str:
+        try:
+            for index in range(TOKENS):
+                time.sleep(0.01)
+                for callback in callbacks:
+                    callback.on_llm_new_token(f"t{index} ")
+                self.emitted += 1
+            return TEXT
+        except BaseException as error:
+            self.error = error
+            raise
+        finally:
+            self.finished.set()
+
+
+def test_generation_is_cancelled_when_the_last_subscriber_leaves():
+    single_flight = SingleFlight(enabled=True, max_workers=2)
+    generation = Generation()
+
+    with pytest.raises(Disconnected):
+        single_flight.run("key", generation, [Client(disconnect_after=3)])
+
+    assert generation.finished.wait(5)
+    assert isinstance(generation.error, FlightCancelled)
+    assert generation.emitted < TOKENS
+
+    retry = Generation()
+    assert single_flight.run("key", retry, [Client()]) == TEXT
+    assert retry.emitted == TOKENS
+
+
+def test_generation_survives_a_follower_leaving():
+    single_flight = SingleFlight(enabled=True, max_workers=2)
+    generation = Generation()
+    leader = Client()
+    result = []
+
+    thread = threading.Thread(
+        target=lambda: result.append(single_flight.run("key", generation, [leader]))
+    )
+    thread.start()
+    time.sleep(0.05)
+    with pytest.raises(Disconnected):
+        single_flight.run("key", Generation(), [Client(disconnect_after=1)])
+    thread.join(timeout=5)
+
+    assert generation.error is None
+    assert generation.emitted == TOKENS
+    assert result == [TEXT]
+    assert "".join(leader.tokens) == TEXT
@@ -0,0 +1,61 @@
+from uuid import uuid4
+
+import pytest
+
+import chat_o_sophy.session as session_module
+from chat_o_sophy.history import ChatHistory
+from chat_o_sophy.session import ChatSession
+from chat_o_sophy.store import ConversationStore
+
+LANGUAGE = "English"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> ConversationStore:
+    store = ConversationStore(str(tmp_path / "conversations.sqlite3"), ttl=3600)
+    monkeypatch.setattr(session_module, "CONVERSATION_STORE", store)
+    return store
+
+
+def test_saved_conversation_resumes(store, fake_model_version, container):
+    session = ChatSession(
+        philosopher="Plato",
+        language=LANGUAGE,
+        model_provider="fake",
+        model_name="fake-chat",
+        model_version=fake_model_version(),
+    )
+    for index in range(3):
+        session.chatbot.chat(f"Question {index} {uuid4()}", LANGUAGE, container=container)
+
+    resumed = ChatSession.resume(session.conversation_id)
+
+    assert resumed is not None
+    assert resumed.model_version == session.model_version
+    assert resumed.history.total == session.history.total == 6
+    assert resumed.history.digest == session.history.digest
+    assert [(record.role, record.content) for record in resumed.history.slice()] == [
+        (record.role, record.content) for record in session.history.slice()
+    ]
+    assert resumed.chatbot.memory_state == session.chatbot.memory_state
+
+
+def test_unknown_conversation_does_not_resume(store):
+    assert ChatSession.resume(uuid4().hex) is None
+
+
+def test_purge_deletes_expired_conversations(store):
+    for conversation_id in ("expired", "fresh"):
+        history = ChatHistory()
+        history.append("human", "What is virtue?")
+        history.append("ai", "Knowledge.")
+        store.save(conversation_id, {}, history)
+    with store.connection:
+        store.connection.execute(
+            "UPDATE conversations SET updated_at = updated_at - 7200 WHERE id = 'expired'"
+        )
+
+    assert store.purge() == 1
+    assert store.load_state("expired") is None
+    assert store.count("expired") == 0
+    assert store.count("fresh") == 2
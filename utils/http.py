@@ -0,0 +1,86 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_shared_adapter = None
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    def close(self):
+        pass
+
+
+class TimeoutSession(requests.Session):
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(
+    timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+    pool_connections=POOL_CONNECTIONS,
+    pool_maxsize=POOL_MAXSIZE,
+    max_retries=MAX_RETRIES,
+    backoff_factor=BACKOFF_FACTOR,
+) -> TimeoutSession:
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=False,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        pool_block=True,
+    )
+    session = TimeoutSession(timeout=timeout)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> TimeoutSession:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def create_shared_session() -> requests.Session:
+    global _shared_adapter
+    if _shared_adapter is None:
+        with _session_lock:
+            if _shared_adapter is None:
+                _shared_adapter = SharedHTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=0,
+                )
+    session = requests.Session()
+    session.mount("https://", _shared_adapter)
+    session.mount("http://", _shared_adapter)
+    return session
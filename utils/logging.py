@@ -1,20 +1,134 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Iterator, Optional, TypeVar
+from uuid import uuid4
+
+import yaml
+
+with open(Path(__file__).resolve().parents[1] / "config/logging.yaml") as f:
+    LOGGING_CONFIG = yaml.safe_load(f)
+
+TRACE_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "trace_id", default=None
+)
+RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "trace_id"}
+
+T = TypeVar("T")
+
+_handler: Optional["DroppingQueueHandler"] = None
+_handler_lock = threading.Lock()
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None) -> Iterator[str]:
+    if trace_id is None and (current := TRACE_ID.get()) is not None:
+        yield current
+        return
+    trace_id = trace_id or uuid4().hex[:16]
+    token = TRACE_ID.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        TRACE_ID.reset(token)
+
+
+async def traced(coroutine: Coroutine, trace_id: Optional[str]):
+    TRACE_ID.set(trace_id)
+    return await coroutine
+
+
+def bind_context(function: Callable[..., T], *args: Any, **kwargs: Any) -> Callable[[], T]:
+    context = contextvars.copy_context()
+    return lambda: context.run(function, *args, **kwargs)
+
+
+class TraceFilter(logging.Filter):
+    def filter(self, record):
+        record.trace_id = TRACE_ID.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+            "trace_id": getattr(record, "trace_id", None),
+        }
+        payload.update(
+            (key, value) for key, value in vars(record).items() if key not in RECORD_FIELDS
+        )
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.addFilter(TraceFilter())
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def queue_handler() -> DroppingQueueHandler:
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            formatter: logging.Formatter
+            if LOGGING_CONFIG["format"] == "json":
+                formatter = JSONFormatter()
+            else:
+                formatter = logging.Formatter(
+                    "%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s"
+                )
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(formatter)
+            log_queue: queue.Queue[logging.LogRecord] = queue.Queue(
+                maxsize=LOGGING_CONFIG["queue_size"]
+            )
+            listener = QueueListener(log_queue, stream_handler)
+            listener.start()
+            atexit.register(listener.stop)
+            _handler = DroppingQueueHandler(log_queue)
+        return _handler
 
 
 def configure_logger(file):
     script_name = os.path.splitext(os.path.basename(file))[0]
 
     logger = logging.getLogger(script_name)
-    logger.setLevel(logging.INFO)
-
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    logger.setLevel(LOGGING_CONFIG["level"])
 
     if not logger.hasHandlers():
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
+        logger.addHandler(queue_handler())
 
     return logger
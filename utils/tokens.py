@@ -0,0 +1,18 @@
+import math
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    return tiktoken.get_encoding("cl100k_base") if tiktoken else None
+
+
+def count_tokens(text: str) -> int:
+    if encoding := get_encoding():
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
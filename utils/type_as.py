@@ -1,20 +1,21 @@
-from typing import List, Literal, Optional, TypedDict
+from typing import Literal, Optional, Union
 
 BotTypeAs = Literal["philosopher", "assistant"]
 PhilosopherTypeAs = Optional[str]
-ProviderTypeAs = Literal["openai", "replicate"]
+ProviderTypeAs = Literal["openai", "replicate", "fake"]
 ModelNameTypeAs = Literal[
-    "gpt-3.5-turbo", "mistral-7b-instruct-v0.1", "llama-2-7b-chat", "dolly-v2-12b", "vicuna-13b"
+    "gpt-3.5-turbo",
+    "mistral-7b-instruct-v0.1",
+    "llama-2-7b-chat",
+    "dolly-v2-12b",
+    "vicuna-13b",
+    "fake-chat",
+    "fake-llm",
 ]
 LanguageTypeAs = Literal["English", "French", "German", "Spanish"]
 ModelOwnerTypeAs = Optional[Literal["mistralai", "meta"]]
 ModelVersionTypeAs = Optional[str]
 RoleTypeAs = Literal["ai", "human"]
-
-
-class ChatHistory(TypedDict):
-    role: RoleTypeAs
-    content: str
-
-
-ChatHistoryTypeAs = List[ChatHistory]
+SpeakerTypeAs = Union[RoleTypeAs, str]
+SynthesisTaskTypeAs = Literal["summary", "summary_text", "summary_table"]
+ModeTypeAs = Literal["single", "multi", "prewarm", "batch"]